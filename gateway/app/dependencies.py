@@ -1,34 +1,151 @@
+import hashlib
 import os
-from typing import Any, Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, Tuple, TypeVar
 
 import httpx
-from fastapi import Header, HTTPException, Request
-from jose import JWTError, jwt
+import jwt
+import orjson
+from fastapi import Header, HTTPException, Request, Response
 
 from shared.cache import cache_client
 
 USERS_SERVICE_URL = os.getenv("USERS_SERVICE_URL")
+USERS_ME_URL = f"{USERS_SERVICE_URL}/users/me"
 ACCESS_SECRET_KEY = os.getenv("ACCESS_SECRET_KEY")
+_JWT_ALGORITHMS = ("HS256",)
 _USER_PROFILE_TTL = 300  # секунд
+_TOKEN_CACHE_TTL = 30  # секунд
+_TOKEN_CACHE_MAX_SIZE = 10_000
+_INVALID_TOKEN_CACHE_TTL = 60  # секунд
+_INVALID_TOKEN_CACHE_MAX_SIZE = 50_000
+
+_V = TypeVar("_V")
+
+
+class TTLCache(Generic[_V]):
+    """
+    Небольшой in-process кэш с TTL на запись и ограничением размера (вытесняются самые старые записи).
+    Работает внутри одного event loop, поэтому блокировки не нужны.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._data: "OrderedDict[bytes, Tuple[_V, float]]" = OrderedDict()
+
+    def get(self, key: bytes) -> Optional[_V]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: bytes, value: _V, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._data[key] = (value, time.time() + ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: bytes) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# sha256(token) -> user_id: повторные запросы с тем же токеном не проверяют подпись заново
+_token_cache: TTLCache[str] = TTLCache(max_size=_TOKEN_CACHE_MAX_SIZE)
+# Недавно отклонённые токены — повторные запросы с ними отсекаются без jwt.decode
+_invalid_token_cache: TTLCache[bool] = TTLCache(max_size=_INVALID_TOKEN_CACHE_MAX_SIZE)
 
 # Shared client — reuses connections across requests
+# Размер пула настраивается под нагрузку конкретного деплоя
+_HTTP_MAX_CONNECTIONS = int(os.getenv("GATEWAY_HTTP_MAX_CONNECTIONS", "1000"))
+_HTTP_MAX_KEEPALIVE = int(os.getenv("GATEWAY_HTTP_MAX_KEEPALIVE", "200"))
+_HTTP_CONNECT_TIMEOUT = 2.0
+_HTTP_WRITE_TIMEOUT = 5.0
+_HTTP_POOL_TIMEOUT = 2.0
+
+
+def upstream_timeout(read: float) -> httpx.Timeout:
+    """Таймаут запроса к сервису: общие лимиты на подключение, отправку и ожидание пула, своё время на ответ."""
+    return httpx.Timeout(connect=_HTTP_CONNECT_TIMEOUT, read=read, write=_HTTP_WRITE_TIMEOUT, pool=_HTTP_POOL_TIMEOUT)
+
+
 _http_client: Optional[httpx.AsyncClient] = None
 
 
 def get_http_client() -> httpx.AsyncClient:
+    """
+    Общий httpx-клиент процесса.
+    Создаётся в lifespan при старте приложения; ленивое создание — запасной вариант (тесты, скрипты).
+    """
     global _http_client
     if _http_client is None or _http_client.is_closed:
         _http_client = httpx.AsyncClient(
-            limits=httpx.Limits(max_connections=None, max_keepalive_connections=200),
-            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=_HTTP_MAX_CONNECTIONS, max_keepalive_connections=_HTTP_MAX_KEEPALIVE),
+            timeout=upstream_timeout(10.0),
+            headers={"User-Agent": "smart-budget-gateway/1.0"},
         )
     return _http_client
 
 
+async def close_http_client() -> None:
+    """Закрывает общий клиент и его пул соединений (вызывается при остановке приложения)."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+def upstream_error_detail(response: httpx.Response, default: str) -> Any:
+    """
+    Достаёт detail из ответа сервиса с ошибкой.
+    Если тело не JSON (HTML от прокси, пустой ответ) — возвращает default вместо 500.
+    """
+    try:
+        payload = response.json()
+    except ValueError:
+        return default
+    if isinstance(payload, dict):
+        return payload.get("detail", default)
+    return default
+
+
+def upstream_error_response(response: httpx.Response, default: str) -> Response:
+    """
+    Отдаёт ошибку сервиса клиенту с тем же статусом без HTTPException.
+    JSON-тело пересылается байтами, не-JSON (HTML от прокси, пустой ответ) заменяется на {"detail": default}.
+    """
+    if response.headers.get("content-type", "").startswith("application/json"):
+        return Response(content=response.content, status_code=response.status_code, media_type="application/json")
+    return Response(
+        content=orjson.dumps({"detail": default}), status_code=response.status_code, media_type="application/json"
+    )
+
+
+_BEARER_PREFIX = "Bearer "
+# Заголовки длиннее этого не разбираем — валидный access-токен заметно короче
+_MAX_TOKEN_LENGTH = 4096
+
+
 def _extract_token(authorization: Optional[str], token: Optional[str]) -> str:
-    if authorization and authorization.startswith("Bearer "):
-        return authorization.split(" ")[1]
+    if authorization and authorization.startswith(_BEARER_PREFIX):
+        if len(authorization) > _MAX_TOKEN_LENGTH:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return authorization[len(_BEARER_PREFIX) :]
     if token:
+        if len(token) > _MAX_TOKEN_LENGTH:
+            raise HTTPException(status_code=401, detail="Invalid token")
         return token
     raise HTTPException(
         status_code=401,
@@ -36,15 +153,46 @@ def _extract_token(authorization: Optional[str], token: Optional[str]) -> str:
     )
 
 
-def _decode_token(token_value: str) -> str:
-    try:
-        payload = jwt.decode(token_value, ACCESS_SECRET_KEY, algorithms=["HS256"], options={"verify_signature": True})
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(401, "Invalid token: missing user ID")
+def _token_cache_key(token_value: str) -> bytes:
+    """Ключ кэша — хэш токена, сам токен в памяти не хранится."""
+    return hashlib.sha256(token_value.encode()).digest()
+
+
+def _resolve_user_id(token_value: str) -> str | None:
+    """
+    Общая проверка access-токена без исключений наружу.
+    Возвращает sub из токена или None, если токен невалиден.
+    """
+    cache_key = _token_cache_key(token_value)
+    user_id = _token_cache.get(cache_key)
+    if user_id is not None:
         return user_id
-    except JWTError as e:
-        raise HTTPException(401, f"Invalid token: {str(e)}")
+    if _invalid_token_cache.get(cache_key):
+        return None
+
+    try:
+        payload = jwt.decode(token_value, ACCESS_SECRET_KEY, algorithms=_JWT_ALGORITHMS)
+    except jwt.InvalidTokenError:
+        payload = None
+    user_id = payload.get("sub") if payload and payload.get("type") == "access" else None
+    if not user_id:
+        _invalid_token_cache.set(cache_key, True, _INVALID_TOKEN_CACHE_TTL)
+        return None
+
+    # Запись не должна пережить сам токен
+    ttl = _TOKEN_CACHE_TTL
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    _token_cache.set(cache_key, user_id, ttl)
+    return user_id
+
+
+def _decode_token(token_value: str) -> str:
+    user_id = _resolve_user_id(token_value)
+    if user_id is None:
+        raise HTTPException(401, "Invalid token")
+    return user_id
 
 
 # TODO: убрать query запрос, когда будет продакшн
@@ -54,7 +202,8 @@ async def get_current_user(
     token: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    Лёгкая аутентификация — только локальная проверка JWT, без HTTP-вызова к users-service.
+    Лёгкая аутентификация — только локальная проверка JWT (подпись, exp, type=access),
+    без HTTP-вызова к users-service.
     Используется для большинства эндпоинтов, которым нужен только user_id.
     """
     token_value = _extract_token(authorization, token)
@@ -69,7 +218,7 @@ async def get_current_user_with_profile(
 ) -> Dict[str, Any]:
     """
     Полная аутентификация — JWT + HTTP-вызов к users-service для получения профиля.
-    Используется только там, где нужны данные пользователя (GET /auth/me, PUT /auth/me).
+    Используется только там, где нужны данные пользователя (GET /auth/me).
     """
     token_value = _extract_token(authorization, token)
     user_id = _decode_token(token_value)
@@ -89,17 +238,23 @@ async def get_current_user_with_profile(
         headers = {"Authorization": f"Bearer {token_value}"}
         cookies = {"refresh_token": refresh_token} if refresh_token else {}
 
-        response = await client.get(f"{USERS_SERVICE_URL}/users/me", headers=headers, cookies=cookies)
+        response = await client.get(USERS_ME_URL, headers=headers, cookies=cookies)
 
         if response.status_code == 200:
-            user_data = response.json()
+            user_data = orjson.loads(response.content)
             try:
                 await cache_client.set(cache_key, user_data, ttl=_USER_PROFILE_TTL)
             except Exception:
                 pass
             return {"token": token_value, "user": user_data, "user_id": user_id}
 
-        error_detail = response.json().get("detail", "Invalid token")
+        if response.status_code == 401:
+            # users-service отклонил токен — следующий запрос проверит подпись заново.
+            # В кэш отказов не кладём: 401 бывает и из-за отсутствующей/чужой refresh cookie,
+            # а сам access токен при этом валиден для остальных маршрутов
+            _token_cache.pop(_token_cache_key(token_value))
+
+        error_detail = upstream_error_detail(response, "Invalid token")
         raise HTTPException(status_code=response.status_code, detail=error_detail)
 
     except httpx.ConnectError:
@@ -113,17 +268,10 @@ def verify_websocket_token(token: str) -> int | None:
     Проверка JWT токена для WebSocket соединений.
     Возвращает user_id если токен валиден, иначе None.
     """
+    user_id_str = _resolve_user_id(token)
+    if user_id_str is None:
+        return None
     try:
-        payload = jwt.decode(token, ACCESS_SECRET_KEY, algorithms=["HS256"])
-
-        if payload.get("type") != "access":
-            return None
-
-        user_id_str = payload.get("sub")
-        if user_id_str is None:
-            return None
-
         return int(user_id_str)
-
-    except (JWTError, ValueError, TypeError):
+    except (ValueError, TypeError):
         return None
@@ -4,7 +4,7 @@ import sys
 from contextlib import asynccontextmanager
 
 import uvicorn
-from app.dependencies import get_http_client
+from app.dependencies import close_http_client, get_http_client
 from app.routers import (
     auth,
     bank_accounts,
@@ -18,6 +18,8 @@ from app.routers import (
 )
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from shared.cache import cache_client
@@ -31,23 +33,38 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await cache_client.connect()
+    # Пул соединений к внутренним сервисам создаётся один раз на процесс
+    app.state.http_client = get_http_client()
     yield
-    client = get_http_client()
-    if not client.is_closed:
-        await client.aclose()
+    await close_http_client()
     await cache_client.close()
 
 
-app = FastAPI(title="Gateway Service", description="Точка входа", version="1.0.0", lifespan=lifespan)
+# Ответы, которые собирает сам gateway, сериализуются orjson
+app = FastAPI(
+    title="Gateway Service",
+    description="Точка входа",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
+# Сжимаем только ответы от 1 КБ (списки транзакций, категорий): короткие JSON с токенами дешевле отдать как есть.
+# Добавляется раньше LoggingMiddleware, чтобы видеть ответ целиком, а не потоком чанков
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 app.add_middleware(LoggingMiddleware)
 
+# Явный список origin'ов из CORS_ORIGINS (через запятую); без него разрешён только localhost для разработки
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()]
+_DEV_ORIGIN_REGEX = r"https?://(localhost|127\.0\.0\.1)(:\d+)?"
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_origin_regex=None if CORS_ORIGINS else _DEV_ORIGIN_REGEX,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
 app.include_router(auth.router)
@@ -70,4 +87,4 @@ async def health():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
@@ -0,0 +1,21 @@
+from typing import Any
+
+import httpx
+from fastapi import HTTPException
+
+
+async def forward(client: httpx.AsyncClient, method: str, url: str, *, service: str, **kwargs: Any) -> httpx.Response:
+    """
+    Отправляет запрос к внутреннему сервису и возвращает его ответ как есть.
+    Исключение только при сетевой ошибке: сервис недоступен или пул соединений занят — 503, таймаут — 504.
+    Статус ответа разбирает вызывающий (ошибки отдаются клиенту через upstream_error_response).
+    """
+    try:
+        return await getattr(client, method)(url, **kwargs)
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail=f"{service} is unavailable")
+    except httpx.PoolTimeout:
+        # Все соединения пула заняты — отказываем сразу, а не копим очередь запросов
+        raise HTTPException(status_code=503, detail=f"{service} is overloaded")
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail=f"{service} timeout")
@@ -1,14 +1,66 @@
+import hashlib
 import os
 from typing import Any, Dict
 
 import httpx
-from app.dependencies import get_current_user_with_profile, get_http_client
+from app.dependencies import (
+    TTLCache,
+    get_current_user,
+    get_current_user_with_profile,
+    get_http_client,
+    upstream_error_detail,
+    upstream_timeout,
+)
+from app.proxy import forward
 from app.schemas.authorization_schemas import RegisterRequest, UserLogin, UserUpdateRequest
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 USERS_SERVICE_URL = os.getenv("USERS_SERVICE_URL")
+_REGISTER_URL = f"{USERS_SERVICE_URL}/users/register"
+_LOGIN_URL = f"{USERS_SERVICE_URL}/users/login"
+_REFRESH_URL = f"{USERS_SERVICE_URL}/users/refresh"
+_LOGOUT_URL = f"{USERS_SERVICE_URL}/users/logout"
+_ME_URL = f"{USERS_SERVICE_URL}/users/me"
+# Регистрация хэширует пароль (argon2) — ей нужно больше времени на ответ
+_REGISTER_TIMEOUT = upstream_timeout(30.0)
+_AUTH_TIMEOUT = upstream_timeout(15.0)
+
+# Недавно отклонённые логины (email + пароль + IP) — повтор в течение пары секунд не доходит до users-service
+_REJECTED_LOGIN_TTL = 2  # секунд
+_rejected_logins: TTLCache[bool] = TTLCache(max_size=100_000)
+
+
+def _login_attempt_key(user_data: UserLogin, request: Request) -> bytes:
+    client_host = request.client.host if request.client else ""
+    raw = "\x00".join((user_data.email, user_data.password, client_host))
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+
+# Тела запросов сериализуются pydantic сразу в байты (model_dump_json), без промежуточного dict
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+async def _call_users(method: str, url: str, default_error: str, **kwargs: Any) -> httpx.Response:
+    """
+    Запрос к users-service через общий клиент.
+    Ответ 4xx/5xx превращается в HTTPException с detail апстрима — логину нужен статус отказа,
+    а logout снимает cookie и при ошибке сервиса.
+    """
+    upstream = await forward(get_http_client(), method, url, service="Users service", **kwargs)
+    if upstream.status_code >= 400:
+        raise HTTPException(status_code=upstream.status_code, detail=upstream_error_detail(upstream, default_error))
+    return upstream
+
+
+def _passthrough(upstream: httpx.Response) -> Response:
+    """Отдаёт успешный ответ users-service как есть — без разбора и повторной сериализации JSON."""
+    response = Response(content=upstream.content, status_code=upstream.status_code, media_type="application/json")
+    # Каждый Set-Cookie переносится отдельным заголовком: headers["set-cookie"] склеил бы их через запятую
+    for cookie in upstream.headers.get_list("set-cookie"):
+        response.headers.append("set-cookie", cookie)
+    return response
 
 
 # ----------------------------
@@ -94,26 +146,22 @@ async def register(user_data: RegisterRequest):
     - `503 Service Unavailable` - Сервис пользователей временно недоступен
     """
 
-    client = get_http_client()
-    try:
-        request_data = user_data.model_dump()
-
-        response = await client.post(f"{USERS_SERVICE_URL}/users/register", json=request_data, timeout=30.0)
-
-        if response.status_code >= 400:
-            error_detail = response.json().get("detail", "Registration failed")
-            raise HTTPException(status_code=response.status_code, detail=error_detail)
-        return response.json()
-
-    except httpx.ConnectError:
-        raise HTTPException(status_code=503, detail="Users service unavailable")
+    upstream = await _call_users(
+        "post",
+        _REGISTER_URL,
+        "Registration failed",
+        content=user_data.model_dump_json(),
+        headers=_JSON_HEADERS,
+        timeout=_REGISTER_TIMEOUT,
+    )
+    return _passthrough(upstream)
 
 
 # ----------------------------
 # Логин пользователя
 # ----------------------------
 @router.post("/login")
-async def login(response: Response, user_data: UserLogin):
+async def login(user_data: UserLogin, request: Request):
     """
     Аутентификация пользователя в системе.
 
@@ -159,35 +207,31 @@ async def login(response: Response, user_data: UserLogin):
     - `503 Service Unavailable` - Сервис пользователей временно недоступен
     """
 
-    client = get_http_client()
-    try:
-        request_data = user_data.model_dump()
-
-        response_internal = await client.post(f"{USERS_SERVICE_URL}/users/login", json=request_data, timeout=15.0)
-
-        if response_internal.status_code >= 400:
-            raise HTTPException(
-                status_code=response_internal.status_code,
-                detail=response_internal.json().get("detail", "Login failed"),
-            )
-
-        result = response_internal.json()
-
-        if "set-cookie" in response_internal.headers:
-            refresh_cookie = response_internal.headers["set-cookie"]
-            response.headers["set-cookie"] = refresh_cookie
-
-        return result
+    attempt_key = _login_attempt_key(user_data, request)
+    if _rejected_logins.get(attempt_key):
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
 
-    except httpx.ConnectError:
-        raise HTTPException(status_code=503, detail="Users service unavailable")
+    try:
+        upstream = await _call_users(
+            "post",
+            _LOGIN_URL,
+            "Login failed",
+            content=user_data.model_dump_json(),
+            headers=_JSON_HEADERS,
+            timeout=_AUTH_TIMEOUT,
+        )
+    except HTTPException as e:
+        if e.status_code == 401:
+            _rejected_logins.set(attempt_key, True, _REJECTED_LOGIN_TTL)
+        raise
+    return _passthrough(upstream)
 
 
 # ----------------------------
 # Обновление токена
 # ----------------------------
 @router.post("/refresh")
-async def refresh_token(response: Response, request: Request):
+async def refresh_token(request: Request):
     """
     Обновление access token с помощью refresh token.
 
@@ -220,35 +264,16 @@ async def refresh_token(response: Response, request: Request):
     - `503 Service Unavailable` - Сервис пользователей временно недоступен
     """
 
-    client = get_http_client()
-    try:
-        cookies = {"refresh_token": request.cookies.get("refresh_token", "")}
-
-        response_internal = await client.post(f"{USERS_SERVICE_URL}/users/refresh", cookies=cookies, timeout=15.0)
-
-        if response_internal.status_code >= 400:
-            raise HTTPException(
-                status_code=response_internal.status_code,
-                detail=response_internal.json().get("detail", "Token refresh failed"),
-            )
-
-        result = response_internal.json()
-
-        if "set-cookie" in response_internal.headers:
-            refresh_cookie = response_internal.headers["set-cookie"]
-            response.headers["set-cookie"] = refresh_cookie
-
-        return result
-
-    except httpx.ConnectError:
-        raise HTTPException(status_code=503, detail="Users service unavailable")
+    cookies = {"refresh_token": request.cookies.get("refresh_token", "")}
+    upstream = await _call_users("post", _REFRESH_URL, "Token refresh failed", cookies=cookies, timeout=_AUTH_TIMEOUT)
+    return _passthrough(upstream)
 
 
 # ----------------------------
 # Выход из системы
 # ----------------------------
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
     """
     Выход пользователя из системы.
 
@@ -274,23 +299,18 @@ async def logout(response: Response):
     💡 **Примечание:** Cookie удаляется даже при недоступности сервиса пользователей
     """
 
-    client = get_http_client()
+    # Cookie сбрасываем локально до обращения к users-service
+    response.delete_cookie(key="refresh_token", secure=False, samesite="strict")
+    # users-service отзывает refresh токен из cookie — повторно обменять его на новые токены уже нельзя
+    cookies = {"refresh_token": request.cookies.get("refresh_token", "")}
     try:
-        response_internal = await client.post(f"{USERS_SERVICE_URL}/users/logout", timeout=10.0)
-
-        response.delete_cookie(key="refresh_token", secure=False, samesite="strict")
-
-        if response_internal.status_code >= 400:
-            raise HTTPException(
-                status_code=response_internal.status_code,
-                detail=response_internal.json().get("detail", "Logout failed"),
-            )
-
-        return {"msg": "Logged out"}
-
-    except httpx.ConnectError:
-        response.delete_cookie(key="refresh_token", secure=False, samesite="strict")
-        raise HTTPException(status_code=503, detail="Users service unavailable")
+        await _call_users("post", _LOGOUT_URL, "Logout failed", cookies=cookies)
+    except HTTPException as e:
+        # Заголовки response при исключении теряются — переносим удаление cookie в ответ с ошибкой
+        raise HTTPException(
+            status_code=e.status_code, detail=e.detail, headers={"set-cookie": response.headers["set-cookie"]}
+        )
+    return {"msg": "Logged out"}
 
 
 # ----------------------------
@@ -361,7 +381,7 @@ async def get_me(current_user: Dict[Any, Any] = Depends(get_current_user_with_pr
 # ----------------------------
 @router.put("/me")
 async def update_me(
-    update_data: UserUpdateRequest, current_user: Dict[str, Any] = Depends(get_current_user_with_profile), request: Request = None
+    update_data: UserUpdateRequest, current_user: Dict[str, Any] = Depends(get_current_user), request: Request = None
 ):
     """
     Обновление данных профиля текущего пользователя.
@@ -435,23 +455,17 @@ async def update_me(
 
     """
 
-    client = get_http_client()
-    try:
-        request_data = update_data.model_dump(exclude_unset=True)
-
-        refresh_token = request.cookies.get("refresh_token") if request else None
-
-        headers = {"Authorization": f"Bearer {current_user['token']}", "Content-Type": "application/json"}
-        cookies = {"refresh_token": refresh_token} if refresh_token else {}
-
-        response = await client.put(
-            f"{USERS_SERVICE_URL}/users/me", json=request_data, headers=headers, cookies=cookies, timeout=15.0
-        )
-
-        if response.status_code >= 400:
-            error_detail = response.json().get("detail", "Update failed")
-            raise HTTPException(status_code=response.status_code, detail=error_detail)
-        return response.json()
-
-    except httpx.ConnectError:
-        raise HTTPException(status_code=503, detail="Users service unavailable")
+    refresh_token = request.cookies.get("refresh_token") if request else None
+    headers = {"Authorization": f"Bearer {current_user['token']}", "Content-Type": "application/json"}
+    cookies = {"refresh_token": refresh_token} if refresh_token else {}
+
+    upstream = await _call_users(
+        "put",
+        _ME_URL,
+        "Update failed",
+        content=update_data.model_dump_json(exclude_unset=True),
+        headers=headers,
+        cookies=cookies,
+        timeout=_AUTH_TIMEOUT,
+    )
+    return _passthrough(upstream)
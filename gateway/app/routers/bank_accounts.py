@@ -1,12 +1,15 @@
 import os
 
 import httpx
-from app.dependencies import get_current_user, get_http_client
+import orjson
+from app.dependencies import get_current_user, get_http_client, upstream_error_detail
 from fastapi import APIRouter, Depends, HTTPException, Request
 
 router = APIRouter(prefix="/users/me", tags=["bank_accounts"])
 
 USERS_SERVICE_URL = os.getenv("USERS_SERVICE_URL")
+_BANK_ACCOUNT_URL = f"{USERS_SERVICE_URL}/users/me/bank_account"
+_BANK_ACCOUNTS_URL = f"{USERS_SERVICE_URL}/users/me/bank_accounts"
 
 
 @router.post(
@@ -139,20 +142,20 @@ async def add_bank_account(request: Request, bank_account: dict, current_user: d
         cookies = dict(request.cookies)
 
         response = await client.post(
-            f"{USERS_SERVICE_URL}/users/me/bank_account",
+            _BANK_ACCOUNT_URL,
             json=bank_account,
             headers={"Authorization": f"Bearer {current_user.get('token')}"},
             cookies=cookies,
         )
 
         if response.status_code == 400:
-            error_detail = response.json().get("detail", "Bad request")
+            error_detail = upstream_error_detail(response, "Bad request")
             raise HTTPException(status_code=400, detail=error_detail)
         elif response.status_code == 404:
             raise HTTPException(status_code=404, detail="Счет не найден в банковской системе")
 
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Таймаут при добавлении счета")
@@ -251,13 +254,13 @@ async def get_bank_accounts(request: Request, current_user: dict = Depends(get_c
         cookies = dict(request.cookies)
 
         response = await client.get(
-            f"{USERS_SERVICE_URL}/users/me/bank_accounts",
+            _BANK_ACCOUNTS_URL,
             headers={"Authorization": f"Bearer {current_user.get('token')}"},
             cookies=cookies,
         )
 
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Таймаут при получении счетов")
@@ -363,7 +366,7 @@ async def rename_bank_account(
         if response.status_code == 404:
             raise HTTPException(status_code=404, detail="Банковский счет не найден")
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Таймаут при переименовании счета")
     except httpx.HTTPStatusError as e:
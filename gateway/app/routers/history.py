@@ -2,14 +2,17 @@ import os
 from typing import Any, Dict, List
 from uuid import UUID
 
-import httpx
-from app.dependencies import get_current_user, get_http_client
+import orjson
+from app.dependencies import get_current_user, get_http_client, upstream_error_response
+from app.proxy import forward
 from app.schemas.history_schema import DeleteResponse, HistoryEntryResponse
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 router = APIRouter(prefix="/history", tags=["history"])
 
 HISTORY_SERVICE_URL = os.getenv("HISTORY_SERVICE_URL", "http://history-service:8007")
+_SERVICE = "History service"
+_USER_HISTORY_URL = f"{HISTORY_SERVICE_URL}/history/user/me"
 
 
 @router.get(
@@ -77,24 +80,19 @@ async def get_user_history(
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        response = await client.get(
-            f"{HISTORY_SERVICE_URL}/history/user/me",
-            headers={"X-User-ID": str(user_id)},
-            params={"skip": skip, "limit": limit},
-            timeout=10.0,
-        )
+    response = await forward(
+        client,
+        "get",
+        _USER_HISTORY_URL,
+        headers={"X-User-ID": str(user_id)},
+        params={"skip": skip, "limit": limit},
+        service=_SERVICE,
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to get history")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "History service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "History service timeout")
+    return upstream_error_response(response, "Failed to get history")
 
 
 @router.get(
@@ -132,22 +130,15 @@ async def get_user_history(
 async def get_history_entry(entry_id: UUID, current_user: Dict[str, Any] = Depends(get_current_user)):
     """Проксирует запрос на получение записи истории к history-service."""
     client = get_http_client()
-    try:
-        response = await client.get(f"{HISTORY_SERVICE_URL}/history/{entry_id}", timeout=10.0)
-
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(client, "get", f"{HISTORY_SERVICE_URL}/history/{entry_id}", service=_SERVICE)
 
-        if response.status_code == 404:
-            raise HTTPException(404, "History entry not found")
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to get history entry")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 404:
+        raise HTTPException(404, "History entry not found")
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "History service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "History service timeout")
+    return upstream_error_response(response, "Failed to get history entry")
 
 
 @router.delete(
@@ -180,21 +171,18 @@ async def delete_history_entry(entry_id: UUID, current_user: Dict[str, Any] = De
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        response = await client.delete(
-            f"{HISTORY_SERVICE_URL}/history/{entry_id}", headers={"X-User-ID": str(user_id)}, timeout=10.0
-        )
-
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(
+        client,
+        "delete",
+        f"{HISTORY_SERVICE_URL}/history/{entry_id}",
+        headers={"X-User-ID": str(user_id)},
+        service=_SERVICE,
+    )
 
-        if response.status_code == 404:
-            raise HTTPException(404, "History entry not found or access denied")
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to delete history entry")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 404:
+        raise HTTPException(404, "History entry not found or access denied")
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "History service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "History service timeout")
+    return upstream_error_response(response, "Failed to delete history entry")
@@ -1,13 +1,21 @@
 import os
 from typing import Any, Dict
 
-import httpx
-from app.dependencies import get_current_user, get_http_client
-from fastapi import APIRouter, Depends, HTTPException, Response
+import orjson
+from app.dependencies import get_current_user, get_http_client, upstream_error_response, upstream_timeout
+from app.proxy import forward
+from fastapi import APIRouter, Depends, Response
 
 router = APIRouter(prefix="/images", tags=["images"])
 
 IMAGES_SERVICE_URL = os.getenv("IMAGES_SERVICE_URL", "http://images-service:8003")
+_SERVICE = "Images service"
+_DEFAULT_AVATAR_URL = f"{IMAGES_SERVICE_URL}/images/avatars/default"
+_MY_AVATAR_URL = f"{IMAGES_SERVICE_URL}/images/avatars/me"
+_CATEGORY_IMAGES_URL = f"{IMAGES_SERVICE_URL}/images/mappings/categories"
+_MERCHANT_IMAGES_URL = f"{IMAGES_SERVICE_URL}/images/mappings/merchants"
+# Больше таймаут для загрузки изображений
+_UPLOAD_TIMEOUT = upstream_timeout(30.0)
 
 
 @router.get(
@@ -30,19 +38,12 @@ async def get_default_avatars():
     Проксирует запрос к images-service.
     """
     client = get_http_client()
-    try:
-        response = await client.get(f"{IMAGES_SERVICE_URL}/images/avatars/default", timeout=10.0)
+    response = await forward(client, "get", _DEFAULT_AVATAR_URL, service=_SERVICE)
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to get default avatars")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Images service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Images service timeout")
+    return upstream_error_response(response, "Failed to get default avatars")
 
 
 @router.get(
@@ -69,21 +70,14 @@ async def get_my_avatar(current_user: Dict[str, Any] = Depends(get_current_user)
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
-
-        response = await client.get(f"{IMAGES_SERVICE_URL}/images/avatars/me", headers=headers, timeout=10.0)
+    headers = {"X-User-ID": str(user_id)}
 
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(client, "get", _MY_AVATAR_URL, headers=headers, service=_SERVICE)
 
-        error_detail = response.json().get("detail", "Failed to get user avatar")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Images service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Images service timeout")
+    return upstream_error_response(response, "Failed to get user avatar")
 
 
 @router.put(
@@ -118,23 +112,14 @@ async def update_my_avatar(request: Dict[str, Any], current_user: Dict[str, Any]
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
-
-        response = await client.put(
-            f"{IMAGES_SERVICE_URL}/images/avatars/me", headers=headers, json=request, timeout=10.0
-        )
+    headers = {"X-User-ID": str(user_id)}
 
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(client, "put", _MY_AVATAR_URL, headers=headers, json=request, service=_SERVICE)
 
-        error_detail = response.json().get("detail", "Failed to update user avatar")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Images service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Images service timeout")
+    return upstream_error_response(response, "Failed to update user avatar")
 
 
 @router.get(
@@ -160,30 +145,26 @@ async def get_image(image_id: str):
     Проксирует запрос к images-service.
     """
     client = get_http_client()
-    try:
-        response = await client.get(
-            f"{IMAGES_SERVICE_URL}/images/{image_id}",
-            timeout=30.0,  # Больше таймаут для загрузки изображений
+    response = await forward(
+        client,
+        "get",
+        f"{IMAGES_SERVICE_URL}/images/{image_id}",
+        timeout=_UPLOAD_TIMEOUT,
+        service=_SERVICE,
+    )
+
+    if response.status_code == 200:
+        # Возвращаем изображение с правильными заголовками
+        return Response(
+            content=response.content,
+            media_type=response.headers.get("content-type", "image/jpeg"),
+            headers={
+                "Cache-Control": response.headers.get("cache-control", "public, max-age=31536000"),
+                "Content-Length": response.headers.get("content-length", str(len(response.content))),
+            },
         )
 
-        if response.status_code == 200:
-            # Возвращаем изображение с правильными заголовками
-            return Response(
-                content=response.content,
-                media_type=response.headers.get("content-type", "image/jpeg"),
-                headers={
-                    "Cache-Control": response.headers.get("cache-control", "public, max-age=31536000"),
-                    "Content-Length": response.headers.get("content-length", str(len(response.content))),
-                },
-            )
-
-        error_detail = response.json().get("detail", "Image not found")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Images service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Images service timeout")
+    return upstream_error_response(response, "Image not found")
 
 
 @router.get(
@@ -206,19 +187,12 @@ async def get_categories_mapping():
     Проксирует запрос к images-service.
     """
     client = get_http_client()
-    try:
-        response = await client.get(f"{IMAGES_SERVICE_URL}/images/mappings/categories", timeout=10.0)
+    response = await forward(client, "get", _CATEGORY_IMAGES_URL, service=_SERVICE)
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to get categories mapping")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Images service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Images service timeout")
+    return upstream_error_response(response, "Failed to get categories mapping")
 
 
 @router.get(
@@ -241,16 +215,9 @@ async def get_merchants_mapping():
     Проксирует запрос к images-service.
     """
     client = get_http_client()
-    try:
-        response = await client.get(f"{IMAGES_SERVICE_URL}/images/mappings/merchants", timeout=10.0)
-
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(client, "get", _MERCHANT_IMAGES_URL, service=_SERVICE)
 
-        error_detail = response.json().get("detail", "Failed to get merchants mapping")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Images service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Images service timeout")
+    return upstream_error_response(response, "Failed to get merchants mapping")
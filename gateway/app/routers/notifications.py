@@ -2,14 +2,19 @@ import os
 from typing import Any, Dict, List
 from uuid import UUID
 
-import httpx
-from app.dependencies import get_current_user, get_http_client
+import orjson
+from app.dependencies import get_current_user, get_http_client, upstream_error_response
+from app.proxy import forward
 from app.schemas.notification_schema import MarkAsReadResponse, NotificationResponse, UnreadCountResponse
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 NOTIFICATION_SERVICE_URL = os.getenv("NOTIFICATION_SERVICE_URL", "http://notification-service:8006")
+_SERVICE = "Notification service"
+_USER_NOTIFICATIONS_URL = f"{NOTIFICATION_SERVICE_URL}/notifications/user/me"
+_UNREAD_COUNT_URL = f"{NOTIFICATION_SERVICE_URL}/notifications/user/me/unread/count"
+_MARK_ALL_READ_URL = f"{NOTIFICATION_SERVICE_URL}/notifications/mark-all-as-read"
 
 
 @router.get(
@@ -78,26 +83,21 @@ async def get_user_notifications(
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
+    headers = {"X-User-ID": str(user_id)}
 
-        response = await client.get(
-            f"{NOTIFICATION_SERVICE_URL}/notifications/user/me",
-            headers=headers,
-            params={"skip": skip, "limit": limit},
-            timeout=10.0,
-        )
+    response = await forward(
+        client,
+        "get",
+        _USER_NOTIFICATIONS_URL,
+        headers=headers,
+        params={"skip": skip, "limit": limit},
+        service=_SERVICE,
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to get notifications")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Notification service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Notification service timeout")
+    return upstream_error_response(response, "Failed to get notifications")
 
 
 @router.get(
@@ -130,23 +130,14 @@ async def get_unread_count(current_user: Dict[str, Any] = Depends(get_current_us
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
-
-        response = await client.get(
-            f"{NOTIFICATION_SERVICE_URL}/notifications/user/me/unread/count", headers=headers, timeout=10.0
-        )
+    headers = {"X-User-ID": str(user_id)}
 
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(client, "get", _UNREAD_COUNT_URL, headers=headers, service=_SERVICE)
 
-        error_detail = response.json().get("detail", "Failed to get unread count")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Notification service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Notification service timeout")
+    return upstream_error_response(response, "Failed to get unread count")
 
 
 @router.get(
@@ -175,22 +166,17 @@ async def get_notification_by_id(notification_id: UUID, current_user: Dict[str,
     Возвращает полную информацию об уведомлении.
     """
     client = get_http_client()
-    try:
-        response = await client.get(f"{NOTIFICATION_SERVICE_URL}/notifications/{notification_id}", timeout=10.0)
-
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(
+        client, "get", f"{NOTIFICATION_SERVICE_URL}/notifications/{notification_id}", service=_SERVICE
+    )
 
-        if response.status_code == 404:
-            raise HTTPException(404, "Notification not found")
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to get notification")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 404:
+        raise HTTPException(404, "Notification not found")
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Notification service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Notification service timeout")
+    return upstream_error_response(response, "Failed to get notification")
 
 
 @router.post(
@@ -229,28 +215,23 @@ async def mark_as_read(notification_id: UUID, current_user: Dict[str, Any] = Dep
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
+    headers = {"X-User-ID": str(user_id)}
 
-        response = await client.post(
-            f"{NOTIFICATION_SERVICE_URL}/notifications/{notification_id}/mark-as-read",
-            headers=headers,
-            timeout=10.0,
-        )
+    response = await forward(
+        client,
+        "post",
+        f"{NOTIFICATION_SERVICE_URL}/notifications/{notification_id}/mark-as-read",
+        headers=headers,
+        service=_SERVICE,
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        if response.status_code == 404:
-            raise HTTPException(404, "Notification not found or access denied")
+    if response.status_code == 404:
+        raise HTTPException(404, "Notification not found or access denied")
 
-        error_detail = response.json().get("detail", "Failed to mark notification as read")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Notification service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Notification service timeout")
+    return upstream_error_response(response, "Failed to mark notification as read")
 
 
 @router.post(
@@ -290,23 +271,14 @@ async def mark_all_as_read(current_user: Dict[str, Any] = Depends(get_current_us
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
-
-        response = await client.post(
-            f"{NOTIFICATION_SERVICE_URL}/notifications/mark-all-as-read", headers=headers, timeout=10.0
-        )
+    headers = {"X-User-ID": str(user_id)}
 
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(client, "post", _MARK_ALL_READ_URL, headers=headers, service=_SERVICE)
 
-        error_detail = response.json().get("detail", "Failed to mark all notifications as read")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Notification service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Notification service timeout")
+    return upstream_error_response(response, "Failed to mark all notifications as read")
 
 
 @router.delete(
@@ -343,23 +315,20 @@ async def delete_notification(notification_id: UUID, current_user: Dict[str, Any
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
-
-        response = await client.delete(
-            f"{NOTIFICATION_SERVICE_URL}/notifications/{notification_id}", headers=headers, timeout=10.0
-        )
+    headers = {"X-User-ID": str(user_id)}
 
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(
+        client,
+        "delete",
+        f"{NOTIFICATION_SERVICE_URL}/notifications/{notification_id}",
+        headers=headers,
+        service=_SERVICE,
+    )
 
-        if response.status_code == 404:
-            raise HTTPException(404, "Notification not found or access denied")
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to delete notification")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 404:
+        raise HTTPException(404, "Notification not found or access denied")
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Notification service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Notification service timeout")
+    return upstream_error_response(response, "Failed to delete notification")
@@ -2,14 +2,18 @@ import os
 from typing import Any, Dict, List
 from uuid import UUID
 
-import httpx
-from app.dependencies import get_current_user, get_http_client
+import orjson
+from app.dependencies import get_current_user, get_http_client, upstream_error_response
+from app.proxy import forward
 from app.schemas.purpose_schema import PurposeCreate, PurposeResponse, PurposeUpdate
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 
 router = APIRouter(prefix="/purposes", tags=["purposes"])
 
 PURPOSES_SERVICE_URL = os.getenv("PURPOSES_SERVICE_URL", "http://purposes-service:8005")
+_SERVICE = "Purposes service"
+_CREATE_PURPOSE_URL = f"{PURPOSES_SERVICE_URL}/purpose/create"
+_MY_PURPOSES_URL = f"{PURPOSES_SERVICE_URL}/purpose/my"
 
 
 @router.post(
@@ -50,26 +54,21 @@ async def create_purpose(purpose: PurposeCreate, current_user: Dict[str, Any] =
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
+    headers = {"X-User-ID": str(user_id)}
 
-        response = await client.post(
-            f"{PURPOSES_SERVICE_URL}/purpose/create",
-            headers=headers,
-            json=purpose.model_dump(mode="json"),
-            timeout=10.0,
-        )
+    response = await forward(
+        client,
+        "post",
+        _CREATE_PURPOSE_URL,
+        headers=headers,
+        json=purpose.model_dump(mode="json"),
+        service=_SERVICE,
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to create purpose")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Purposes service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Purposes service timeout")
+    return upstream_error_response(response, "Failed to create purpose")
 
 
 @router.get(
@@ -116,21 +115,14 @@ async def get_purposes_by_user(current_user: Dict[str, Any] = Depends(get_curren
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
-
-        response = await client.get(f"{PURPOSES_SERVICE_URL}/purpose/my", headers=headers, timeout=10.0)
+    headers = {"X-User-ID": str(user_id)}
 
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(client, "get", _MY_PURPOSES_URL, headers=headers, service=_SERVICE)
 
-        error_detail = response.json().get("detail", "Failed to get purposes")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Purposes service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Purposes service timeout")
+    return upstream_error_response(response, "Failed to get purposes")
 
 
 @router.put(
@@ -172,26 +164,21 @@ async def update_purpose(
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
+    headers = {"X-User-ID": str(user_id)}
 
-        response = await client.put(
-            f"{PURPOSES_SERVICE_URL}/purpose/update/{purpose_id}",
-            headers=headers,
-            json=purpose_update.model_dump(exclude_none=True, mode="json"),
-            timeout=10.0,
-        )
+    response = await forward(
+        client,
+        "put",
+        f"{PURPOSES_SERVICE_URL}/purpose/update/{purpose_id}",
+        headers=headers,
+        json=purpose_update.model_dump(exclude_none=True, mode="json"),
+        service=_SERVICE,
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-        error_detail = response.json().get("detail", "Failed to update purpose")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Purposes service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Purposes service timeout")
+    return upstream_error_response(response, "Failed to update purpose")
 
 
 @router.delete(
@@ -220,20 +207,13 @@ async def delete_purpose(purpose_id: UUID, current_user: Dict[str, Any] = Depend
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
-
-        response = await client.delete(
-            f"{PURPOSES_SERVICE_URL}/purpose/delete/{purpose_id}", headers=headers, timeout=10.0
-        )
+    headers = {"X-User-ID": str(user_id)}
 
-        if response.status_code == 200:
-            return response.json()
+    response = await forward(
+        client, "delete", f"{PURPOSES_SERVICE_URL}/purpose/delete/{purpose_id}", headers=headers, service=_SERVICE
+    )
 
-        error_detail = response.json().get("detail", "Failed to delete purpose")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    if response.status_code == 200:
+        return orjson.loads(response.content)
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Purposes service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Purposes service timeout")
+    return upstream_error_response(response, "Failed to delete purpose")
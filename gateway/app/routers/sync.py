@@ -1,6 +1,7 @@
 import os
 
 import httpx
+import orjson
 from app.dependencies import get_current_user, get_http_client
 from fastapi import APIRouter, Depends, HTTPException, Request
 
@@ -8,6 +9,9 @@ router = APIRouter(prefix="/sync", tags=["sync"])
 
 TRANSACTIONS_SERVICE_URL = os.getenv("TRANSACTIONS_SERVICE_URL", "http://transactions-service:8002")
 USERS_SERVICE_URL = os.getenv("USERS_SERVICE_URL", "http://users-service:8001")
+_LAST_SYNC_URL = f"{TRANSACTIONS_SERVICE_URL}/transactions/last_sync"
+_BANK_ACCOUNTS_URL = f"{USERS_SERVICE_URL}/users/me/bank_accounts"
+_SYNC_ACCOUNTS_URL = f"{TRANSACTIONS_SERVICE_URL}/transactions/sync_user_accounts"
 
 
 @router.get(
@@ -53,11 +57,11 @@ async def get_last_sync(request: Request, current_user: dict = Depends(get_curre
     client = get_http_client()
     try:
         response = await client.get(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/last_sync",
+            _LAST_SYNC_URL,
             headers={"X-User-ID": str(user_id)},
         )
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     except httpx.ConnectError:
         raise HTTPException(status_code=503, detail="Сервис транзакций недоступен")
     except httpx.TimeoutException:
@@ -138,12 +142,12 @@ async def sync_all_user_accounts(request: Request, current_user: dict = Depends(
         cookies = dict(request.cookies)
         client = get_http_client()
         accounts_response = await client.get(
-            f"{USERS_SERVICE_URL}/users/me/bank_accounts",
+            _BANK_ACCOUNTS_URL,
             headers={"Authorization": f"Bearer {current_user.get('token')}"},
             cookies=cookies,
         )
         accounts_response.raise_for_status()
-        accounts = accounts_response.json()
+        accounts = orjson.loads(accounts_response.content)
 
         if not accounts:
             return {
@@ -158,9 +162,7 @@ async def sync_all_user_accounts(request: Request, current_user: dict = Depends(
 
         client = get_http_client()
         try:
-            sync_response = await client.post(
-                f"{TRANSACTIONS_SERVICE_URL}/transactions/sync_user_accounts", json={"user_id": user_id}
-            )
+            sync_response = await client.post(_SYNC_ACCOUNTS_URL, json={"user_id": user_id})
 
             if sync_response.status_code == 200:
                 # Синхронизация прошла успешно для всех счетов
@@ -177,7 +179,7 @@ async def sync_all_user_accounts(request: Request, current_user: dict = Depends(
                         }
                     )
 
-        except Exception as e:
+        except httpx.HTTPError as e:
             # Если произошла ошибка, отмечаем все счета как failed
             for account in accounts:
                 results.append(
@@ -190,14 +192,14 @@ async def sync_all_user_accounts(request: Request, current_user: dict = Depends(
             "details": results,
         }
 
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail="Users service is unavailable")
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Таймаут при синхронизации счетов")
     except httpx.HTTPStatusError as e:
         raise HTTPException(
             status_code=e.response.status_code, detail=f"Ошибка при получении счетов: {e.response.text}"
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка: {str(e)}")
 
 
 @router.post(
@@ -258,12 +260,12 @@ async def sync_single_account(bank_account_id: int, request: Request, current_us
         cookies = dict(request.cookies)
         client = get_http_client()
         accounts_response = await client.get(
-            f"{USERS_SERVICE_URL}/users/me/bank_accounts",
+            _BANK_ACCOUNTS_URL,
             headers={"Authorization": f"Bearer {current_user.get('token')}"},
             cookies=cookies,
         )
         accounts_response.raise_for_status()
-        accounts = accounts_response.json()
+        accounts = orjson.loads(accounts_response.content)
 
         # 2. Ищем нужный счет
         target_account = next((acc for acc in accounts if acc.get("bank_account_id") == bank_account_id), None)
@@ -273,9 +275,7 @@ async def sync_single_account(bank_account_id: int, request: Request, current_us
 
         # 3. Синхронизируем через transactions-service
         client = get_http_client()
-        sync_response = await client.post(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/sync_user_accounts", json={"user_id": user_id}
-        )
+        sync_response = await client.post(_SYNC_ACCOUNTS_URL, json={"user_id": user_id})
         sync_response.raise_for_status()
 
         return {
@@ -288,7 +288,7 @@ async def sync_single_account(bank_account_id: int, request: Request, current_us
         raise
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Таймаут синхронизации")
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail="Service is unavailable")
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail=f"Ошибка синхронизации: {e.response.text}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка: {str(e)}")
@@ -1,9 +1,11 @@
+import asyncio
 import os
 from typing import Any, Dict, List, Optional
 
-import httpx
-from app.dependencies import get_current_user, get_http_client
+from app.dependencies import TTLCache, get_current_user, get_http_client, upstream_error_response
+from app.proxy import forward
 from app.schemas.transaction_schema import (
+    CategoryMonthlySummaryResponse,
     CategoryResponse,
     CategorySummaryRequest,
     CategorySummaryResponse,
@@ -11,11 +13,25 @@ from app.schemas.transaction_schema import (
     TransactionResponse,
     UpdateTransactionCategoryRequest,
 )
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 TRANSACTIONS_SERVICE_URL = os.getenv("TRANSACTIONS_SERVICE_URL", "http://transactions-service:8002")
+_SERVICE = "Transactions service"
+_TRANSACTIONS_URL = f"{TRANSACTIONS_SERVICE_URL}/transactions/"
+_CATEGORY_SUMMARY_URL = f"{TRANSACTIONS_SERVICE_URL}/transactions/categories/summary"
+_CATEGORY_MONTHLY_URL = f"{TRANSACTIONS_SERVICE_URL}/transactions/categories/monthly"
+_CATEGORIES_URL = f"{TRANSACTIONS_SERVICE_URL}/transactions/categories"
+
+# Справочник категорий общий для всех пользователей и почти не меняется — держим готовые байты ответа в памяти
+_CATEGORIES_CACHE_TTL = 60  # секунд
+_categories_cache: TTLCache[bytes] = TTLCache(max_size=8)
+_categories_lock = asyncio.Lock()
+
+# Пакетный запрос: не больше _BATCH_MAX_SIZE наборов фильтров, к сервису одновременно — не больше _BATCH_CONCURRENCY
+_BATCH_MAX_SIZE = 50
+_BATCH_CONCURRENCY = 20
 
 
 @router.post(
@@ -40,7 +56,9 @@ TRANSACTIONS_SERVICE_URL = os.getenv("TRANSACTIONS_SERVICE_URL", "http://transac
 | `merchant_ids` | list[int] | Список ID мерчантов |
 | `bank_account_ids` | list[int] | Список ID банковских счетов |
 | `limit` | int | Количество записей (1-100, обязательное) |
-| `offset` | int | Смещение для пагинации |
+| `offset` | int | Смещение для пагинации (устарело — используйте курсор) |
+| `after_created_at` | datetime | Курсор: `created_at` последней транзакции предыдущей страницы |
+| `after_id` | UUID | Курсор: `id` последней транзакции предыдущей страницы (вместе с `after_created_at`) |
 
 ## Примеры запросов
 
@@ -80,6 +98,17 @@ TRANSACTIONS_SERVICE_URL = os.getenv("TRANSACTIONS_SERVICE_URL", "http://transac
     "limit": 50
 }
 ```
+
+### Следующая страница по курсору
+Вместо `offset` передайте `created_at` и `id` последней транзакции предыдущей страницы —
+страница выбирается по индексу, её стоимость не растёт с глубиной пролистывания.
+```json
+{
+    "after_created_at": "2024-01-15T14:30:00",
+    "after_id": "550e8400-e29b-41d4-a716-446655440000",
+    "limit": 50
+}
+```
 """,
     responses={
         200: {
@@ -120,24 +149,78 @@ async def get_transactions(filters: TransactionFilterRequest, current_user: Dict
 
     request_data = filters.model_dump(exclude_none=True, mode="json")
 
+    headers = {"X-User-ID": str(user_id)}
+
     client = get_http_client()
-    try:
-        headers = {"X-User-ID": str(user_id)}
+    response = await forward(client, "post", _TRANSACTIONS_URL, headers=headers, json=request_data, service=_SERVICE)
 
-        response = await client.post(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/", headers=headers, json=request_data, timeout=10.0
-        )
+    if response.status_code == 200:
+        # Схема ответа совпадает с transactions-service — отдаём байты без разбора и повторной сериализации
+        return Response(content=response.content, media_type="application/json")
 
-        if response.status_code == 200:
-            return response.json()
+    return upstream_error_response(response, "Failed to get transactions")
+
+
+@router.post(
+    "/batch",
+    response_model=List[List[TransactionResponse]],
+    summary="Получить несколько списков транзакций одним запросом",
+    description=f"""
+Выполнить несколько запросов `POST /transactions/` одним вызовом — например, доходы и расходы для соседних панелей.
+
+**Требует авторизации:** JWT токен в заголовке Authorization.
+
+Тело — массив наборов фильтров (как у `POST /transactions/`, от 1 до {_BATCH_MAX_SIZE}).
+Ответ — массив списков транзакций в том же порядке. Запросы к сервису транзакций идут параллельно,
+не больше {_BATCH_CONCURRENCY} одновременно. Если хотя бы один запрос завершился ошибкой, возвращается эта ошибка.
+
+**Пример тела запроса:**
+```json
+[{{"transaction_type": "income", "limit": 20}}, {{"transaction_type": "expense", "limit": 20}}]
+```
+""",
+    responses={
+        401: {"description": "Не авторизован"},
+        422: {"description": f"Пустой массив, больше {_BATCH_MAX_SIZE} наборов или некорректные фильтры"},
+        503: {"description": "Сервис транзакций недоступен"},
+        504: {"description": "Таймаут сервиса транзакций"},
+    },
+)
+async def get_transactions_batch(
+    filters: List[TransactionFilterRequest] = Body(..., min_length=1, max_length=_BATCH_MAX_SIZE),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    headers = {"X-User-ID": str(current_user["user_id"])}
+    client = get_http_client()
+    # Семафор на запрос: один пакет не занимает весь пул соединений к сервису
+    semaphore = asyncio.Semaphore(_BATCH_CONCURRENCY)
+
+    async def fetch(item: TransactionFilterRequest):
+        async with semaphore:
+            return await forward(
+                client,
+                "post",
+                _TRANSACTIONS_URL,
+                headers=headers,
+                json=item.model_dump(exclude_none=True, mode="json"),
+                service=_SERVICE,
+            )
+
+    # TaskGroup при первой сетевой ошибке (503/504 из forward) отменяет остальные запросы пакета,
+    # а не оставляет их держать семафор и соединения пула
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(fetch(item)) for item in filters]
+    except* HTTPException as errors:
+        raise errors.exceptions[0]
+    responses = [task.result() for task in tasks]
 
-        error_detail = response.json().get("detail", "Failed to get transactions")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    for response in responses:
+        if response.status_code != 200:
+            return upstream_error_response(response, "Failed to get transactions")
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Transaction service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Transactions service timeout")
+    # Каждый ответ — уже готовый JSON-массив, склеиваем байты без разбора
+    return Response(content=b"[" + b",".join(r.content for r in responses) + b"]", media_type="application/json")
 
 
 @router.patch(
@@ -191,24 +274,19 @@ async def update_transaction_category(
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        response = await client.patch(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/{transaction_id}/category",
-            headers={"X-User-ID": str(user_id)},
-            json=body.model_dump(),
-            timeout=10.0,
-        )
+    response = await forward(
+        client,
+        "patch",
+        f"{TRANSACTIONS_SERVICE_URL}/transactions/{transaction_id}/category",
+        headers={"X-User-ID": str(user_id)},
+        json=body.model_dump(),
+        service=_SERVICE,
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return Response(content=response.content, media_type="application/json")
 
-        error_detail = response.json().get("detail", "Failed to update transaction category")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Transaction service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Transactions service timeout")
+    return upstream_error_response(response, "Failed to update transaction category")
 
 
 @router.post(
@@ -268,24 +346,74 @@ async def get_category_summary(
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        response = await client.post(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/categories/summary",
-            headers={"X-User-ID": str(user_id)},
-            json=filters.model_dump(exclude_none=True, mode="json"),
-            timeout=10.0,
-        )
+    response = await forward(
+        client,
+        "post",
+        _CATEGORY_SUMMARY_URL,
+        headers={"X-User-ID": str(user_id)},
+        json=filters.model_dump(exclude_none=True, mode="json"),
+        service=_SERVICE,
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return Response(content=response.content, media_type="application/json")
 
-        error_detail = response.json().get("detail", "Failed to get category summary")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
+    return upstream_error_response(response, "Failed to get category summary")
 
-    except httpx.ConnectError:
-        raise HTTPException(503, "Transaction service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Transactions service timeout")
+
+@router.post(
+    "/categories/monthly",
+    response_model=List[CategoryMonthlySummaryResponse],
+    summary="Суммы транзакций по категориям помесячно",
+    description="""
+Суммы и количество операций по категориям пользователя с разбивкой по месяцам — для графиков дашборда.
+
+**Требует авторизации:** JWT токен в заголовке Authorization.
+
+Фильтры — как у `POST /transactions/categories/summary`; `start_date` округляется до начала месяца.
+Новые месяцы первыми, внутри месяца — по убыванию суммы.
+Данные пересчитываются раз в сутки, поэтому операции за сегодня могут ещё не попасть в сумму.
+""",
+    responses={
+        200: {
+            "description": "Суммы по категориям за каждый месяц",
+            "content": {
+                "application/json": {
+                    "example": [
+                        {
+                            "month": "2026-01-01T00:00:00+00:00",
+                            "category_id": 1,
+                            "category_name": "Продукты",
+                            "total_amount": 15420.50,
+                            "transaction_count": 42,
+                        }
+                    ]
+                }
+            },
+        },
+        401: {"description": "Не авторизован"},
+        503: {"description": "Сервис транзакций недоступен"},
+        504: {"description": "Таймаут сервиса транзакций"},
+    },
+)
+async def get_category_monthly_summary(
+    filters: CategorySummaryRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    client = get_http_client()
+    response = await forward(
+        client,
+        "post",
+        _CATEGORY_MONTHLY_URL,
+        headers={"X-User-ID": str(current_user["user_id"])},
+        json=filters.model_dump(exclude_none=True, mode="json"),
+        service=_SERVICE,
+    )
+
+    if response.status_code == 200:
+        return Response(content=response.content, media_type="application/json")
+
+    return upstream_error_response(response, "Failed to get monthly category summary")
 
 
 @router.get(
@@ -333,26 +461,29 @@ async def get_categories(
 
     Защищенный эндпоинт, требует JWT токен.
     """
-    client = get_http_client()
-    try:
+    cache_key = type or ""
+    cached = _categories_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    # Один запрос к сервису на истёкший ключ, остальные ждут его результат
+    async with _categories_lock:
+        cached = _categories_cache.get(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
         params = {}
         if type is not None:
             params["type"] = type
 
-        response = await client.get(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/categories", params=params, timeout=10.0
-        )
+        client = get_http_client()
+        response = await forward(client, "get", _CATEGORIES_URL, params=params, service=_SERVICE)
 
         if response.status_code == 200:
-            return response.json()
+            _categories_cache.set(cache_key, response.content, _CATEGORIES_CACHE_TTL)
+            return Response(content=response.content, media_type="application/json")
 
-        error_detail = response.json().get("detail", "Failed to get categories")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Transaction service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Transactions service timeout")
+        return upstream_error_response(response, "Failed to get categories")
 
 
 @router.get(
@@ -377,21 +508,14 @@ async def get_categories(
 )
 async def get_category_by_id(category_id: int, current_user: Dict[str, Any] = Depends(get_current_user)):
     client = get_http_client()
-    try:
-        response = await client.get(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/categories/{category_id}", timeout=10.0
-        )
+    response = await forward(
+        client, "get", f"{TRANSACTIONS_SERVICE_URL}/transactions/categories/{category_id}", service=_SERVICE
+    )
 
-        if response.status_code == 200:
-            return response.json()
+    if response.status_code == 200:
+        return Response(content=response.content, media_type="application/json")
 
-        error_detail = response.json().get("detail", "Failed to get category")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Transaction service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Transactions service timeout")
+    return upstream_error_response(response, "Failed to get category")
 
 
 @router.get(
@@ -436,20 +560,15 @@ async def get_transaction_by_id(transaction_id: str, current_user: Dict[str, Any
     user_id = current_user["user_id"]
 
     client = get_http_client()
-    try:
-        response = await client.get(
-            f"{TRANSACTIONS_SERVICE_URL}/transactions/{transaction_id}",
-            headers={"X-User-ID": str(user_id)},
-            timeout=10.0,
-        )
-
-        if response.status_code == 200:
-            return response.json()
-
-        error_detail = response.json().get("detail", "Failed to get transaction")
-        raise HTTPException(status_code=response.status_code, detail=error_detail)
-
-    except httpx.ConnectError:
-        raise HTTPException(503, "Transaction service is unavailable")
-    except httpx.TimeoutException:
-        raise HTTPException(504, "Transactions service timeout")
+    response = await forward(
+        client,
+        "get",
+        f"{TRANSACTIONS_SERVICE_URL}/transactions/{transaction_id}",
+        headers={"X-User-ID": str(user_id)},
+        service=_SERVICE,
+    )
+
+    if response.status_code == 200:
+        return Response(content=response.content, media_type="application/json")
+
+    return upstream_error_response(response, "Failed to get transaction")
@@ -1,7 +1,18 @@
 import re
-from typing import Optional
+from typing import Annotated, Optional
 
-from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from pydantic import BaseModel, EmailStr, Field, StringConstraints, field_validator, model_validator
+
+# Имя/фамилия: обрезка пробелов и границы длины проверяются в pydantic-core, без Python-валидатора.
+# Только на уровне поля — пароль обрезать нельзя
+NameStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=2, max_length=50)]
+
+# Email при входе уже проверен при регистрации: достаточно дешёвой проверки формата регуляркой в pydantic-core,
+# полный разбор email-validator нужен только на регистрации
+LoginEmailStr = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, to_lower=True, max_length=320, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$"),
+]
 
 
 class RegisterRequest(BaseModel):
@@ -9,8 +20,8 @@ class RegisterRequest(BaseModel):
 
     email: EmailStr
     password: str = Field(..., min_length=8, description="Пароль (минимум 8 символов)")
-    first_name: str
-    last_name: str
+    first_name: NameStr
+    last_name: NameStr
     middle_name: Optional[str] = Field(None, description="Отчество (необязательно)")
 
     @field_validator("password")
@@ -30,18 +41,6 @@ class RegisterRequest(BaseModel):
             raise ValueError("Password must contain at least one special character")
         return v
 
-    @field_validator("first_name", "last_name")
-    @classmethod
-    def validate_required_name(cls, v: str) -> str:
-        v = v.strip()
-        if not v:
-            raise ValueError("Name cannot be empty")
-        if len(v) < 2:
-            raise ValueError("Name must be at least 2 characters long")
-        if len(v) > 50:
-            raise ValueError("Name must be less than 50 characters")
-        return v
-
     @field_validator("middle_name")
     @classmethod
     def validate_middle_name(cls, v: Optional[str]) -> Optional[str]:
@@ -60,7 +59,7 @@ class RegisterRequest(BaseModel):
 class UserLogin(BaseModel):
     """Схема запроса авторизации"""
 
-    email: EmailStr
+    email: LoginEmailStr
     password: str = Field(..., min_length=8, description="Пароль (минимум 8 символов)")
 
     @field_validator("password")
@@ -89,24 +88,10 @@ class UserUpdateRequest(BaseModel):
     Отчество можно установить как пустую строку для удаления.
     """
 
-    first_name: Optional[str] = Field(None, description="Имя (2-50 символов)")
-    last_name: Optional[str] = Field(None, description="Фамилия (2-50 символов)")
+    first_name: Optional[NameStr] = Field(None, description="Имя (2-50 символов)")
+    last_name: Optional[NameStr] = Field(None, description="Фамилия (2-50 символов)")
     middle_name: Optional[str] = Field(None, description="Отчество (пустая строка для удаления)")
 
-    @field_validator("first_name", "last_name")
-    @classmethod
-    def validate_name(cls, v: Optional[str]) -> Optional[str]:
-        if v is None:
-            return None
-        v = v.strip()
-        if not v:
-            raise ValueError("Name cannot be empty")
-        if len(v) < 2:
-            raise ValueError("Name must be at least 2 characters long")
-        if len(v) > 50:
-            raise ValueError("Name must be less than 50 characters")
-        return v
-
     @field_validator("middle_name")
     @classmethod
     def validate_middle_name(cls, v: Optional[str]) -> Optional[str]:
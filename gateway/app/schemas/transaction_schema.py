@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import List, Optional
+from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class TransactionFilterRequest(BaseModel):
@@ -18,7 +19,21 @@ class TransactionFilterRequest(BaseModel):
     merchant_ids: Optional[List[int]] = Field(None, description="Список ID мерчантов для фильтрации")
     bank_account_ids: Optional[List[int]] = Field(None, description="Список ID банковских счетов для фильтрации")
     limit: int = Field(..., ge=1, le=100, description="Количество записей на странице")
-    offset: int = Field(0, ge=0, description="Смещение для пагинации")
+    offset: int = Field(
+        0,
+        ge=0,
+        description="Смещение для пагинации (устарело: глубокие страницы медленные, используйте курсор after_*)",
+    )
+    after_created_at: Optional[datetime] = Field(
+        None, description="Курсор: created_at последней транзакции предыдущей страницы (вместе с after_id)"
+    )
+    after_id: Optional[UUID] = Field(None, description="Курсор: id последней транзакции предыдущей страницы")
+
+    @model_validator(mode="after")
+    def validate_cursor(self):
+        if (self.after_created_at is None) != (self.after_id is None):
+            raise ValueError("after_created_at and after_id must be passed together")
+        return self
 
 
 class TransactionResponse(BaseModel):
@@ -70,3 +85,13 @@ class CategorySummaryResponse(BaseModel):
     category_name: str
     total_amount: float
     transaction_count: int
+
+
+class CategoryMonthlySummaryResponse(BaseModel):
+    """Сумма транзакций по одной категории за один месяц"""
+
+    month: datetime
+    category_id: int
+    category_name: str
+    total_amount: float
+    transaction_count: int
@@ -1,3 +1,4 @@
+import json
 import os
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock
@@ -14,11 +15,14 @@ os.environ.setdefault("PSEUDO_BANK_SERVICE_URL", "http://pseudo-bank-service-tes
 
 from unittest.mock import AsyncMock
 
+import httpx
+import jwt
 import pytest
-from app.dependencies import get_current_user, get_current_user_with_profile
+from app.dependencies import _invalid_token_cache, _token_cache, get_current_user, get_current_user_with_profile
 from app.main import app
+from app.routers.auth import _rejected_logins
+from app.routers.transactions import _categories_cache
 from httpx import ASGITransport, AsyncClient
-from jose import jwt
 
 TEST_SECRET = "test-secret-key-for-gateway"
 USER_ID = "1"
@@ -53,16 +57,19 @@ def make_mock_http_response(
     status_code: int,
     json_data=None,
     content: bytes = None,
-    headers: dict = None,
+    headers=None,
 ):
     """Создаёт MagicMock, имитирующий httpx.Response."""
     mock_resp = MagicMock()
     mock_resp.status_code = status_code
+    mock_resp.headers = httpx.Headers(headers or {})
     if json_data is not None:
+        mock_resp.headers.setdefault("content-type", "application/json")
         mock_resp.json = MagicMock(return_value=json_data)
+        if content is None:
+            content = json.dumps(json_data).encode()
     if content is not None:
         mock_resp.content = content
-    mock_resp.headers = headers or {}
     return mock_resp
 
 
@@ -81,6 +88,20 @@ def mock_cache(monkeypatch):
     return mock
 
 
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """Сбрасываем in-process кэши (токены, отклонённые логины, категории), чтобы тесты не влияли друг на друга."""
+    _token_cache.clear()
+    _invalid_token_cache.clear()
+    _rejected_logins.clear()
+    _categories_cache.clear()
+    yield
+    _token_cache.clear()
+    _invalid_token_cache.clear()
+    _rejected_logins.clear()
+    _categories_cache.clear()
+
+
 @pytest.fixture
 async def client():
     """HTTP-клиент с переопределёнными зависимостями аутентификации."""
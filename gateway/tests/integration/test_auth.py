@@ -6,10 +6,12 @@ get_http_client мокается через patch("app.routers.auth.get_http_cli
 Для /auth/me зависимость get_current_user_with_profile переопределяется напрямую.
 """
 
+import json
 import os
 from unittest.mock import AsyncMock, patch
 
 import httpx as httpx_module
+from app.dependencies import _invalid_token_cache, _token_cache, _token_cache_key
 
 from tests.conftest import (
     make_access_token,
@@ -48,6 +50,29 @@ class TestRegister:
         assert response.status_code == 200
         assert response.json()["email"] == "new@example.com"
 
+    async def test_register_forwards_validated_body(self, client_no_auth):
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(200, json_data={"email": "new@example.com"})
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            await client_no_auth.post("/auth/register", json=VALID_REGISTER_BODY)
+
+        kwargs = mock_http.post.call_args.kwargs
+        assert kwargs["headers"]["Content-Type"] == "application/json"
+        sent = json.loads(kwargs["content"])
+        assert sent["email"] == VALID_REGISTER_BODY["email"]
+        assert sent["first_name"] == "Иван"
+
+    async def test_register_passes_upstream_body_through(self, client_no_auth):
+        raw = b'{"email":"new@example.com","id":7}'
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(201, content=raw)
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            response = await client_no_auth.post("/auth/register", json=VALID_REGISTER_BODY)
+
+        assert response.status_code == 201
+        assert response.content == raw
+        assert response.headers["content-type"] == "application/json"
+
     async def test_register_email_exists(self, client_no_auth):
         mock_http = AsyncMock()
         mock_http.post.return_value = make_mock_http_response(400, json_data={"detail": "Email already registered"})
@@ -99,6 +124,23 @@ class TestLogin:
 
         assert response.status_code == 200
 
+    async def test_login_forwards_every_cookie_separately(self, client_no_auth):
+        cookies = [
+            "refresh_token=abc123; HttpOnly; Path=/; SameSite=strict",
+            "session_hint=1; Path=/auth; Expires=Wed, 21 Oct 2026 07:28:00 GMT",
+        ]
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(
+            200,
+            json_data={"access_token": "tok", "token_type": "bearer"},
+            headers=[("set-cookie", cookie) for cookie in cookies],
+        )
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            response = await client_no_auth.post("/auth/login", json=VALID_LOGIN_BODY)
+
+        assert response.status_code == 200
+        assert response.headers.get_list("set-cookie") == cookies
+
     async def test_login_invalid_credentials(self, client_no_auth):
         mock_http = AsyncMock()
         mock_http.post.return_value = make_mock_http_response(401, json_data={"detail": "Invalid credentials"})
@@ -107,6 +149,28 @@ class TestLogin:
 
         assert response.status_code == 401
 
+    async def test_repeated_rejected_login_not_proxied(self, client_no_auth):
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(401, json_data={"detail": "Incorrect email or password"})
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            first = await client_no_auth.post("/auth/login", json=VALID_LOGIN_BODY)
+            second = await client_no_auth.post("/auth/login", json=VALID_LOGIN_BODY)
+
+        assert first.status_code == 401
+        assert second.status_code == 401
+        assert mock_http.post.call_count == 1
+
+    async def test_rejected_login_does_not_block_other_password(self, client_no_auth):
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(401, json_data={"detail": "Incorrect email or password"})
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            await client_no_auth.post("/auth/login", json=VALID_LOGIN_BODY)
+            mock_http.post.return_value = make_mock_http_response(200, json_data={"access_token": "t"})
+            response = await client_no_auth.post("/auth/login", json={**VALID_LOGIN_BODY, "password": "OtherPass1!"})
+
+        assert response.status_code == 200
+        assert mock_http.post.call_count == 2
+
     async def test_login_service_unavailable(self, client_no_auth):
         mock_http = AsyncMock()
         mock_http.post.side_effect = httpx_module.ConnectError("Connection refused")
@@ -115,6 +179,22 @@ class TestLogin:
 
         assert response.status_code == 503
 
+    async def test_login_pool_exhausted_returns_503(self, client_no_auth):
+        mock_http = AsyncMock()
+        mock_http.post.side_effect = httpx_module.PoolTimeout("No free connections")
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            response = await client_no_auth.post("/auth/login", json=VALID_LOGIN_BODY)
+
+        assert response.status_code == 503
+
+    async def test_login_read_timeout_returns_504(self, client_no_auth):
+        mock_http = AsyncMock()
+        mock_http.post.side_effect = httpx_module.ReadTimeout("Timeout")
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            response = await client_no_auth.post("/auth/login", json=VALID_LOGIN_BODY)
+
+        assert response.status_code == 504
+
 
 # ──────────────────────────────────────────────────────────────
 # POST /auth/refresh
@@ -160,6 +240,17 @@ class TestLogout:
 
         assert response.status_code == 200
         assert response.json()["msg"] == "Logged out"
+        assert "Max-Age=0" in response.headers["set-cookie"]
+
+    async def test_logout_forwards_refresh_cookie(self, client_no_auth):
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(200, json_data={"msg": "Logged out"})
+        with patch("app.routers.auth.get_http_client", return_value=mock_http):
+            client_no_auth.cookies.set("refresh_token", "some-refresh-token")
+            response = await client_no_auth.post("/auth/logout")
+
+        assert response.status_code == 200
+        assert mock_http.post.call_args.kwargs["cookies"] == {"refresh_token": "some-refresh-token"}
 
     async def test_logout_service_unavailable_still_clears_cookie(self, client_no_auth):
         mock_http = AsyncMock()
@@ -168,6 +259,8 @@ class TestLogout:
             response = await client_no_auth.post("/auth/logout")
 
         assert response.status_code == 503
+        assert 'refresh_token=""' in response.headers["set-cookie"]
+        assert "Max-Age=0" in response.headers["set-cookie"]
 
 
 # ──────────────────────────────────────────────────────────────
@@ -198,6 +291,21 @@ class TestGetMe:
         assert data["user"]["email"] == "test@example.com"
         assert data["user_id"] == "1"
 
+    async def test_upstream_401_does_not_lock_out_token(self, client_no_auth):
+        actual_secret = os.getenv("ACCESS_SECRET_KEY", "test-secret-key-for-gateway")
+        token = make_access_token(secret=actual_secret)
+        cache_key = _token_cache_key(token)
+
+        mock_http = AsyncMock()
+        mock_http.get.return_value = make_mock_http_response(401, json_data={"detail": "Invalid token"})
+        with patch("app.dependencies.get_http_client", return_value=mock_http):
+            response = await client_no_auth.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 401
+        # 401 от users-service (например, без refresh cookie) только сбрасывает положительный кэш
+        assert _token_cache.get(cache_key) is None
+        assert _invalid_token_cache.get(cache_key) is None
+
     async def test_valid_token_users_service_unavailable(self, client_no_auth):
         actual_secret = os.getenv("ACCESS_SECRET_KEY", "test-secret-key-for-gateway")
         token = make_access_token(secret=actual_secret)
@@ -0,0 +1,26 @@
+"""
+Интеграционные тесты gzip-сжатия ответов gateway (только ответы от 1 КБ).
+"""
+
+from unittest.mock import AsyncMock, patch
+
+from tests.conftest import make_mock_http_response
+
+
+class TestGzip:
+    async def test_large_response_compressed(self, client):
+        categories = [{"id": i, "name": f"Категория {i}", "type": "expense"} for i in range(100)]
+        mock_http = AsyncMock()
+        mock_http.get.return_value = make_mock_http_response(200, json_data=categories)
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.get("/transactions/categories", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == categories
+
+    async def test_small_response_not_compressed(self, client_no_auth):
+        response = await client_no_auth.get("/health", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
@@ -0,0 +1,31 @@
+"""
+Интеграционные тесты CORS-политики gateway.
+В тестах CORS_ORIGINS не задан — действует dev-режим (только localhost).
+"""
+
+
+class TestCors:
+    async def test_localhost_preflight_allowed(self, client_no_auth):
+        response = await client_no_auth.options(
+            "/health",
+            headers={"Origin": "http://localhost:5173", "Access-Control-Request-Method": "GET"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == "http://localhost:5173"
+        assert response.headers["access-control-allow-credentials"] == "true"
+
+    async def test_foreign_origin_preflight_rejected(self, client_no_auth):
+        response = await client_no_auth.options(
+            "/health",
+            headers={"Origin": "https://evil.example.com", "Access-Control-Request-Method": "GET"},
+        )
+
+        assert response.status_code == 400
+        assert "access-control-allow-origin" not in response.headers
+
+    async def test_foreign_origin_gets_no_cors_headers(self, client_no_auth):
+        response = await client_no_auth.get("/health", headers={"Origin": "https://evil.example.com"})
+
+        assert response.status_code == 200
+        assert "access-control-allow-origin" not in response.headers
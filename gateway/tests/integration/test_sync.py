@@ -82,6 +82,15 @@ class TestSyncAllAccounts:
 
         assert response.status_code == 504
 
+    async def test_users_service_connect_error_returns_503(self, client):
+        mock_http = AsyncMock()
+        mock_http.get.side_effect = httpx.ConnectError("Connection refused")
+
+        with patch("app.routers.sync.get_http_client", return_value=mock_http):
+            response = await client.post("/sync")
+
+        assert response.status_code == 503
+
     async def test_users_service_http_status_error(self, client):
         mock_http = AsyncMock()
         err_resp = MagicMock()
@@ -145,6 +154,15 @@ class TestSyncSingleAccount:
 
         assert response.status_code == 504
 
+    async def test_connect_error_returns_503(self, client):
+        mock_http = AsyncMock()
+        mock_http.get.side_effect = httpx.ConnectError("Connection refused")
+
+        with patch("app.routers.sync.get_http_client", return_value=mock_http):
+            response = await client.post("/sync/1")
+
+        assert response.status_code == 503
+
     async def test_transactions_service_http_error(self, client):
         mock_http = AsyncMock()
         accounts_resp = make_mock_http_response(200, json_data=ACCOUNTS_LIST)
@@ -4,6 +4,7 @@
 Downstream (transactions-service) мокается через patch("app.routers.transactions.get_http_client").
 """
 
+import asyncio
 from unittest.mock import AsyncMock, patch
 
 import httpx as httpx_module
@@ -48,6 +49,16 @@ class TestGetTransactions:
         assert isinstance(data, list)
         assert data[0]["type"] == "expense"
 
+    async def test_upstream_body_passed_through_unchanged(self, client):
+        raw = b'[{"id":"abc","amount":1.5}]'
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(200, content=raw)
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.post("/transactions/", json={"limit": 50})
+
+        assert response.status_code == 200
+        assert response.content == raw
+
     async def test_x_user_id_header_passed_to_downstream(self, client):
         mock_http = AsyncMock()
         mock_http.post.return_value = make_mock_http_response(200, json_data=TRANSACTION_LIST)
@@ -83,6 +94,26 @@ class TestGetTransactions:
         response = await client.post("/transactions/", json={})
         assert response.status_code == 422
 
+    async def test_upstream_error_passed_through(self, client):
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(400, json_data={"detail": "Bad filter"})
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.post("/transactions/", json={"limit": 10})
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Bad filter"}
+
+    async def test_non_json_upstream_error_uses_default_detail(self, client):
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(
+            502, content=b"<html>Bad Gateway</html>", headers={"content-type": "text/html"}
+        )
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.post("/transactions/", json={"limit": 10})
+
+        assert response.status_code == 502
+        assert response.json() == {"detail": "Failed to get transactions"}
+
     async def test_connect_error_returns_503(self, client):
         mock_http = AsyncMock()
         mock_http.post.side_effect = httpx_module.ConnectError("Connection refused")
@@ -130,6 +161,80 @@ class TestGetTransactions:
 # ──────────────────────────────────────────────────────────────
 # GET /transactions/categories  — получить категории
 # ──────────────────────────────────────────────────────────────
+class TestGetTransactionsBatch:
+    async def test_results_returned_in_request_order(self, client):
+        mock_http = AsyncMock()
+        mock_http.post.side_effect = [
+            make_mock_http_response(200, json_data=TRANSACTION_LIST),
+            make_mock_http_response(200, json_data=[]),
+        ]
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.post(
+                "/transactions/batch",
+                json=[{"transaction_type": "expense", "limit": 10}, {"transaction_type": "income", "limit": 10}],
+            )
+
+        assert response.status_code == 200
+        assert response.json() == [TRANSACTION_LIST, []]
+        sent = [call.kwargs["json"] for call in mock_http.post.call_args_list]
+        assert sent == [
+            {"transaction_type": "expense", "limit": 10, "offset": 0},
+            {"transaction_type": "income", "limit": 10, "offset": 0},
+        ]
+        assert all(call.kwargs["headers"]["X-User-ID"] == "1" for call in mock_http.post.call_args_list)
+
+    async def test_upstream_error_returned(self, client):
+        mock_http = AsyncMock()
+        mock_http.post.side_effect = [
+            make_mock_http_response(200, json_data=[]),
+            make_mock_http_response(400, json_data={"detail": "Bad filter"}),
+        ]
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.post("/transactions/batch", json=[{"limit": 10}, {"limit": 10}])
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Bad filter"}
+
+    async def test_network_error_cancels_rest_of_batch(self, client):
+        """Сетевая ошибка одного запроса отменяет остальные, ответ — 503 этого запроса"""
+        started = 0
+        cancelled = 0
+
+        async def post(url, **kwargs):
+            nonlocal started, cancelled
+            started += 1
+            if started == 1:
+                await asyncio.sleep(0)
+                raise httpx_module.ConnectError("refused")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled += 1
+                raise
+            return make_mock_http_response(200, json_data=[])
+
+        mock_http = AsyncMock()
+        mock_http.post.side_effect = post
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await asyncio.wait_for(client.post("/transactions/batch", json=[{"limit": 10}] * 3), timeout=5)
+
+        assert response.status_code == 503
+        assert started == 3
+        assert cancelled == 2
+
+    async def test_empty_batch_returns_422(self, client):
+        response = await client.post("/transactions/batch", json=[])
+        assert response.status_code == 422
+
+    async def test_too_large_batch_returns_422(self, client):
+        response = await client.post("/transactions/batch", json=[{"limit": 1}] * 51)
+        assert response.status_code == 422
+
+    async def test_no_token_returns_401(self, client_no_auth):
+        response = await client_no_auth.post("/transactions/batch", json=[{"limit": 10}])
+        assert response.status_code == 401
+
+
 class TestGetCategories:
     async def test_success_returns_list(self, client):
         mock_http = AsyncMock()
@@ -142,6 +247,44 @@ class TestGetCategories:
         assert len(data) == 3
         assert data[0]["name"] == "Продукты"
 
+    async def test_upstream_body_passed_through_unchanged(self, client):
+        raw = '[{"id":1,"name":"Продукты","type":"expense"}]'.encode()
+        mock_http = AsyncMock()
+        mock_http.get.return_value = make_mock_http_response(200, content=raw)
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.get("/transactions/categories")
+
+        assert response.status_code == 200
+        assert response.content == raw
+
+    async def test_second_call_served_from_cache(self, client):
+        mock_http = AsyncMock()
+        mock_http.get.return_value = make_mock_http_response(200, json_data=CATEGORY_LIST)
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            first = await client.get("/transactions/categories")
+            second = await client.get("/transactions/categories")
+
+        assert first.json() == second.json()
+        assert mock_http.get.call_count == 1
+
+    async def test_cache_keyed_by_type(self, client):
+        mock_http = AsyncMock()
+        mock_http.get.return_value = make_mock_http_response(200, json_data=CATEGORY_LIST)
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            await client.get("/transactions/categories", params={"type": "income"})
+            await client.get("/transactions/categories", params={"type": "expense"})
+
+        assert mock_http.get.call_count == 2
+
+    async def test_error_not_cached(self, client):
+        mock_http = AsyncMock()
+        mock_http.get.return_value = make_mock_http_response(500, json_data={"detail": "boom"})
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            await client.get("/transactions/categories")
+            await client.get("/transactions/categories")
+
+        assert mock_http.get.call_count == 2
+
     async def test_connect_error_returns_503(self, client):
         mock_http = AsyncMock()
         mock_http.get.side_effect = httpx_module.ConnectError("Connection refused")
@@ -161,3 +304,35 @@ class TestGetCategories:
     async def test_no_token_returns_401(self, client_no_auth):
         response = await client_no_auth.get("/transactions/categories")
         assert response.status_code == 401
+
+
+class TestCategoryMonthlySummary:
+    async def test_success_passed_through(self, client):
+        rows = [
+            {
+                "month": "2026-01-01T00:00:00+00:00",
+                "category_id": 1,
+                "category_name": "Продукты",
+                "total_amount": 100.0,
+                "transaction_count": 2,
+            }
+        ]
+        mock_http = AsyncMock()
+        mock_http.post.return_value = make_mock_http_response(200, json_data=rows)
+        with patch("app.routers.transactions.get_http_client", return_value=mock_http):
+            response = await client.post("/transactions/categories/monthly", json={"transaction_type": "expense"})
+
+        assert response.status_code == 200
+        assert response.json() == rows
+        call = mock_http.post.call_args
+        assert call.args[0].endswith("/transactions/categories/monthly")
+        assert call.kwargs["json"] == {"transaction_type": "expense"}
+        assert call.kwargs["headers"]["X-User-ID"] == "1"
+
+    async def test_invalid_type_rejected_at_gateway(self, client):
+        response = await client.post("/transactions/categories/monthly", json={"transaction_type": "other"})
+        assert response.status_code == 422
+
+    async def test_no_token_returns_401(self, client_no_auth):
+        response = await client_no_auth.post("/transactions/categories/monthly", json={})
+        assert response.status_code == 401
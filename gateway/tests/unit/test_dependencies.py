@@ -0,0 +1,217 @@
+"""
+Юнит-тесты для зависимостей аутентификации gateway.
+Нет HTTP — только локальная проверка JWT и in-process кэш.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import jwt
+import pytest
+from app.dependencies import (
+    TTLCache,
+    _decode_token,
+    _extract_token,
+    _invalid_token_cache,
+    _token_cache,
+    _token_cache_key,
+    close_http_client,
+    get_http_client,
+    upstream_error_detail,
+    upstream_timeout,
+    verify_websocket_token,
+)
+from fastapi import HTTPException
+
+from tests.conftest import TEST_SECRET, make_access_token
+
+
+# ──────────────────────────────────────────────────────────────
+# TTLCache
+# ──────────────────────────────────────────────────────────────
+class TestTTLCache:
+    def test_get_missing_returns_none(self):
+        cache = TTLCache(max_size=10)
+        assert cache.get(b"missing") is None
+
+    def test_set_and_get(self):
+        cache = TTLCache(max_size=10)
+        cache.set(b"k", "v", ttl=30)
+        assert cache.get(b"k") == "v"
+
+    def test_expired_entry_is_dropped(self):
+        cache = TTLCache(max_size=10)
+        cache.set(b"k", "v", ttl=30)
+        with patch("app.dependencies.time.time", return_value=time.time() + 31):
+            assert cache.get(b"k") is None
+        assert len(cache) == 0
+
+    def test_non_positive_ttl_is_not_stored(self):
+        cache = TTLCache(max_size=10)
+        cache.set(b"k", "v", ttl=0)
+        assert cache.get(b"k") is None
+
+    def test_oldest_entry_evicted_when_full(self):
+        cache = TTLCache(max_size=2)
+        cache.set(b"a", 1, ttl=30)
+        cache.set(b"b", 2, ttl=30)
+        cache.set(b"c", 3, ttl=30)
+        assert cache.get(b"a") is None
+        assert cache.get(b"b") == 2
+        assert cache.get(b"c") == 3
+
+
+# ──────────────────────────────────────────────────────────────
+# _decode_token
+# ──────────────────────────────────────────────────────────────
+class TestDecodeToken:
+    def test_valid_token_returns_user_id(self):
+        assert _decode_token(make_access_token("42")) == "42"
+
+    def test_invalid_signature_raises_401(self):
+        with pytest.raises(HTTPException) as exc:
+            _decode_token(make_access_token(secret="wrong-secret"))
+        assert exc.value.status_code == 401
+
+    def test_refresh_token_rejected(self):
+        payload = {"sub": "1", "type": "refresh", "exp": datetime.now(tz=timezone.utc) + timedelta(hours=1)}
+        token = jwt.encode(payload, TEST_SECRET, algorithm="HS256")
+        with pytest.raises(HTTPException) as exc:
+            _decode_token(token)
+        assert exc.value.status_code == 401
+
+    def test_expired_token_rejected(self):
+        payload = {"sub": "1", "type": "access", "exp": datetime.now(tz=timezone.utc) - timedelta(minutes=1)}
+        token = jwt.encode(payload, TEST_SECRET, algorithm="HS256")
+        with pytest.raises(HTTPException) as exc:
+            _decode_token(token)
+        assert exc.value.status_code == 401
+
+    def test_repeated_token_decoded_once(self):
+        token = make_access_token("7")
+        with patch("app.dependencies.jwt.decode", wraps=jwt.decode) as decode:
+            assert _decode_token(token) == "7"
+            assert _decode_token(token) == "7"
+        assert decode.call_count == 1
+
+    def test_cache_key_does_not_contain_token(self):
+        token = make_access_token()
+        _decode_token(token)
+        key = _token_cache_key(token)
+        assert _token_cache.get(key) == "1"
+        assert token.encode() not in key
+
+    def test_invalid_token_not_cached(self):
+        token = make_access_token(secret="wrong-secret")
+        with pytest.raises(HTTPException):
+            _decode_token(token)
+        assert len(_token_cache) == 0
+
+    def test_invalid_token_remembered(self):
+        token = make_access_token(secret="wrong-secret")
+        with pytest.raises(HTTPException):
+            _decode_token(token)
+        assert _invalid_token_cache.get(_token_cache_key(token)) is True
+
+    def test_repeated_invalid_token_not_decoded_again(self):
+        token = make_access_token(secret="wrong-secret")
+        with patch("app.dependencies.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                with pytest.raises(HTTPException):
+                    _decode_token(token)
+        assert decode.call_count == 1
+
+
+# ──────────────────────────────────────────────────────────────
+# _extract_token
+# ──────────────────────────────────────────────────────────────
+class TestExtractToken:
+    def test_bearer_header(self):
+        assert _extract_token("Bearer abc.def", None) == "abc.def"
+
+    def test_query_token_fallback(self):
+        assert _extract_token(None, "abc.def") == "abc.def"
+
+    def test_missing_token_raises_401(self):
+        with pytest.raises(HTTPException) as exc:
+            _extract_token(None, None)
+        assert exc.value.status_code == 401
+
+    def test_oversized_header_rejected(self):
+        with pytest.raises(HTTPException) as exc:
+            _extract_token("Bearer " + "a" * 5000, None)
+        assert exc.value.status_code == 401
+
+    def test_oversized_query_token_rejected(self):
+        with pytest.raises(HTTPException) as exc:
+            _extract_token(None, "a" * 5000)
+        assert exc.value.status_code == 401
+
+
+# ──────────────────────────────────────────────────────────────
+# verify_websocket_token
+# ──────────────────────────────────────────────────────────────
+class TestVerifyWebsocketToken:
+    def test_valid_token_returns_int_user_id(self):
+        assert verify_websocket_token(make_access_token("42")) == 42
+
+    def test_invalid_token_returns_none(self):
+        assert verify_websocket_token(make_access_token(secret="wrong-secret")) is None
+
+    def test_non_numeric_sub_returns_none(self):
+        assert verify_websocket_token(make_access_token("abc")) is None
+
+    def test_shares_cache_with_http_auth(self):
+        token = make_access_token("5")
+        _decode_token(token)
+        with patch("app.dependencies.jwt.decode") as decode:
+            assert verify_websocket_token(token) == 5
+        decode.assert_not_called()
+
+
+# ──────────────────────────────────────────────────────────────
+# upstream_error_detail
+# ──────────────────────────────────────────────────────────────
+class TestUpstreamErrorDetail:
+    def test_detail_from_json_body(self):
+        response = MagicMock()
+        response.json.return_value = {"detail": "Not found"}
+        assert upstream_error_detail(response, "fallback") == "Not found"
+
+    def test_json_without_detail_returns_default(self):
+        response = MagicMock()
+        response.json.return_value = {"error": "x"}
+        assert upstream_error_detail(response, "fallback") == "fallback"
+
+    def test_non_json_body_returns_default(self):
+        response = MagicMock()
+        response.json.side_effect = ValueError("Expecting value")
+        assert upstream_error_detail(response, "fallback") == "fallback"
+
+    def test_non_dict_json_returns_default(self):
+        response = MagicMock()
+        response.json.return_value = ["oops"]
+        assert upstream_error_detail(response, "fallback") == "fallback"
+
+
+# ──────────────────────────────────────────────────────────────
+# get_http_client
+# ──────────────────────────────────────────────────────────────
+class TestHttpClient:
+    async def test_client_is_shared_and_identifies_gateway(self):
+        client = get_http_client()
+        try:
+            assert get_http_client() is client
+            assert client.headers["User-Agent"] == "smart-budget-gateway/1.0"
+            assert client.timeout == upstream_timeout(10.0)
+        finally:
+            await close_http_client()
+        assert client.is_closed
+
+    def test_upstream_timeout_keeps_connect_write_and_pool_bounds(self):
+        timeout = upstream_timeout(30.0)
+        assert timeout.read == 30.0
+        assert timeout.connect == 2.0
+        assert timeout.write == 5.0
+        assert timeout.pool == 2.0
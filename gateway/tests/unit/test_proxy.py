@@ -0,0 +1,42 @@
+"""
+Юнит-тесты для общего хелпера проксирования forward().
+"""
+
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from app.proxy import forward
+from fastapi import HTTPException
+
+from tests.conftest import make_mock_http_response
+
+
+class TestForward:
+    async def test_returns_upstream_response_as_is(self):
+        client = AsyncMock()
+        upstream = make_mock_http_response(404, json_data={"detail": "Not found"})
+        client.get.return_value = upstream
+
+        response = await forward(client, "get", "http://svc/x", service="Test service", headers={"X-User-ID": "1"})
+
+        assert response is upstream
+        client.get.assert_awaited_once_with("http://svc/x", headers={"X-User-ID": "1"})
+
+    @pytest.mark.parametrize(
+        "error, status_code, detail",
+        [
+            (httpx.ConnectError("refused"), 503, "Test service is unavailable"),
+            (httpx.PoolTimeout("pool"), 503, "Test service is overloaded"),
+            (httpx.ReadTimeout("read"), 504, "Test service timeout"),
+        ],
+    )
+    async def test_network_errors_mapped(self, error, status_code, detail):
+        client = AsyncMock()
+        client.post.side_effect = error
+
+        with pytest.raises(HTTPException) as exc:
+            await forward(client, "post", "http://svc/x", service="Test service")
+
+        assert exc.value.status_code == status_code
+        assert exc.value.detail == detail
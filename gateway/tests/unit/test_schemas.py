@@ -122,6 +122,25 @@ class TestRegisterRequest:
                 last_name=VALID_LAST,
             )
 
+    def test_names_stripped(self):
+        req = RegisterRequest(
+            email=VALID_EMAIL,
+            password=VALID_PASSWORD,
+            first_name="  Иван ",
+            last_name=f" {VALID_LAST} ",
+        )
+        assert req.first_name == "Иван"
+        assert req.last_name == VALID_LAST
+
+    def test_first_name_whitespace_only(self):
+        with pytest.raises(ValidationError):
+            RegisterRequest(
+                email=VALID_EMAIL,
+                password=VALID_PASSWORD,
+                first_name="   ",
+                last_name=VALID_LAST,
+            )
+
 
 # ──────────────────────────────────────────────────────────────
 # UserLogin
@@ -135,6 +154,10 @@ class TestUserLogin:
         with pytest.raises(ValidationError):
             UserLogin(email="bad-email", password=VALID_PASSWORD)
 
+    def test_email_normalized(self):
+        req = UserLogin(email="  User@Example.COM ", password=VALID_PASSWORD)
+        assert req.email == "user@example.com"
+
     def test_password_too_short(self):
         with pytest.raises(ValidationError):
             UserLogin(email=VALID_EMAIL, password="Ab1!")
@@ -0,0 +1,59 @@
+"""
+Досоздание индексов на уже существующих таблицах Postgres.
+
+create_all создаёт индексы только вместе с новой таблицей. Индексы, добавленные в модели позже,
+строятся здесь через CREATE INDEX CONCURRENTLY: запись в таблицу на время построения не блокируется.
+CONCURRENTLY нельзя выполнять внутри транзакции, поэтому соединение работает в AUTOCOMMIT.
+
+Вызывается фоновой задачей после старта сервиса, а не в create_tables — запуск не ждёт построения.
+"""
+
+import logging
+
+from sqlalchemy import MetaData, bindparam, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateIndex
+
+logger = logging.getLogger(__name__)
+
+_INVALID_INDEXES = text(
+    "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+    "WHERE NOT i.indisvalid AND c.relname IN :names"
+).bindparams(bindparam("names", expanding=True))
+
+
+async def create_missing_indexes_concurrently(engine: AsyncEngine, metadata: MetaData, lock_name: str) -> None:
+    """
+    Построить недостающие индексы metadata без блокировки записи.
+
+    lock_name — имя advisory lock: из нескольких воркеров сервиса индексы строит только один.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    indexes = [index for table in metadata.sorted_tables for index in table.indexes]
+    if not indexes:
+        return
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await conn.scalar(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": lock_name})
+        if not locked:
+            return
+        try:
+            # Прерванный CONCURRENTLY оставляет невалидный индекс, который IF NOT EXISTS пропустил бы навсегда
+            invalid = (await conn.scalars(_INVALID_INDEXES, {"names": [index.name for index in indexes]})).all()
+            for name in invalid:
+                logger.warning(f"Индекс {name} невалиден после прерванного построения — пересоздаём")
+                await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+            for index in indexes:
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+                try:
+                    await conn.execute(text(ddl.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)))
+                except SQLAlchemyError as e:
+                    # Остальные индексы строим дальше; невалидный остаток пересоздастся при следующем запуске
+                    logger.error(f"Не удалось построить индекс {index.name}: {e}")
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": lock_name})
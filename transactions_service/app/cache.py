@@ -1,6 +1,7 @@
 """
 Инициализация кэширования для transactions-service.
 """
+import hashlib
 import os
 
 from shared.cache import CacheClient
@@ -12,6 +13,7 @@ cache_client = CacheClient(redis_url=REDIS_URL)
 
 # TTL (в секундах)
 CATEGORIES_TTL = 43200  # 12 часов
+TRANSACTIONS_LIST_TTL = 30  # списки транзакций: повторные запросы экрана и пагинации в пределах полуминуты
 
 # Ключи кэша для категорий
 CATEGORIES_ALL_KEY = "categories:all"
@@ -19,6 +21,9 @@ CATEGORIES_INCOME_KEY = "categories:income"
 CATEGORIES_EXPENSE_KEY = "categories:expense"
 CATEGORIES_BY_ID_PREFIX = "categories:id:"
 
+# Ключи кэша для списков транзакций пользователя
+TRANSACTIONS_LIST_PREFIX = "transactions:list:"
+
 
 def category_by_id_key(category_id: int) -> str:
     """Ключ для конкретной категории по ID."""
@@ -28,3 +33,14 @@ def category_by_id_key(category_id: int) -> str:
 def categories_pattern() -> str:
     """Шаблон для инвалидации всех ключей категорий."""
     return f"{CATEGORIES_BY_ID_PREFIX}*"
+
+
+def transactions_list_key(user_id: int, filters_json: str) -> str:
+    """Ключ для списка транзакций пользователя с конкретным набором фильтров."""
+    digest = hashlib.blake2b(filters_json.encode(), digest_size=16).hexdigest()
+    return f"{TRANSACTIONS_LIST_PREFIX}{user_id}:{digest}"
+
+
+def transactions_list_pattern(user_id: int) -> str:
+    """Шаблон для инвалидации всех закэшированных списков транзакций пользователя."""
+    return f"{TRANSACTIONS_LIST_PREFIX}{user_id}:*"
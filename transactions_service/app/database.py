@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from shared.db_indexes import create_missing_indexes_concurrently
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,10 +18,37 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Размер пула на процесс (воркер uvicorn); итог по сервису — умножить на число воркеров
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Кэш подготовленных выражений на соединение: Postgres переиспользует план горячих запросов (список, по id).
+# За pgbouncer в режиме transaction pooling выставить 0 — подготовленные выражения там не переживают транзакцию
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1024"))
+
 # Создание асинхронного соединения для БД
 # pool_size/max_overflow not supported by SQLite (used in tests)
-_pool_kwargs = {} if (DATABASE_URL or "").startswith("sqlite") else {"pool_size": 20, "max_overflow": 40, "pool_pre_ping": True}
-engine = create_async_engine(DATABASE_URL, echo=False, future=True, **_pool_kwargs)
+# Для asyncpg create_async_engine сам берёт AsyncAdaptedQueuePool; NullPool открывал бы соединение на каждый запрос
+# pool_recycle — пересоздаём соединения раз в 30 минут, до того как их оборвёт Postgres или балансировщик
+_pool_kwargs = (
+    {}
+    if (DATABASE_URL or "").startswith("sqlite")
+    else {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        # statement_cache_size — кэш самого asyncpg, prepared_statement_cache_size — кэш диалекта SQLAlchemy
+        "connect_args": {
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        },
+    }
+)
+# Логирование SQL только для отладки (SQL_ECHO=1): форматирование каждого запроса дорого на горячем пути
+SQL_ECHO = os.getenv("SQL_ECHO") == "1"
+engine = create_async_engine(DATABASE_URL, echo=SQL_ECHO, future=True, **_pool_kwargs)
 
 # Создание асинхронных сессий для БД
 AsyncSessionLocal = async_sessionmaker(
@@ -27,12 +56,12 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
-# Асинхронное открытие сессии для эндпоинтов при взаимодействии с БД
+# Асинхронное открытие сессии для эндпоинтов при взаимодействии с БД.
+# Автокоммита нет: большинство запросов только читают, а пишущие методы репозиториев коммитят сами.
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
 
         except Exception:
             await session.rollback()
@@ -59,14 +88,71 @@ async def await_db_ready(retries=30, delay=2):
     raise Exception("❌ Не удалось подключиться к базе данных после всех попыток")
 
 
+# Помесячные суммы по категориям для дашборда: чтение идёт по числу групп, а не по всем транзакциям.
+# Только Postgres; обновляется по расписанию (refresh_category_monthly_view)
+CATEGORY_MONTHLY_VIEW = "mv_user_category_monthly"
+
+_CREATE_CATEGORY_MONTHLY_VIEW = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {CATEGORY_MONTHLY_VIEW} WITH (fillfactor = 100) AS
+SELECT user_id,
+       date_trunc('month', created_at) AS month,
+       category_id,
+       type,
+       sum(amount) AS total_amount,
+       count(*) AS transaction_count
+FROM transactions
+GROUP BY user_id, date_trunc('month', created_at), category_id, type
+"""
+
+# Уникальный индекс обязателен для REFRESH ... CONCURRENTLY (чтение view не блокируется на время обновления)
+_CREATE_CATEGORY_MONTHLY_INDEX = (
+    f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{CATEGORY_MONTHLY_VIEW}_key "
+    f"ON {CATEGORY_MONTHLY_VIEW} (user_id, month, category_id, type)"
+)
+
+
+# Прогрев пула: первые запросы после старта не ждут установки соединений с Postgres
+async def warm_up_pool(connections: int = DB_POOL_SIZE):
+    async def _ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    if engine.dialect.name != "postgresql":
+        return
+    # Соединения держатся одновременно, поэтому в пуле оказывается connections разных соединений
+    await asyncio.gather(*(_ping() for _ in range(connections)))
+    logger.info(f"✅ Пул соединений прогрет: {connections}")
+
+
 # Асинхронное создание таблиц в БД
 async def create_tables():
     await await_db_ready()
     async with engine.begin() as conn:
         await conn.run_sync(Transaction_Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text(_CREATE_CATEGORY_MONTHLY_VIEW))
+            await conn.execute(text(_CREATE_CATEGORY_MONTHLY_INDEX))
     logger.info("✅ Таблицы созданы")
 
 
+async def refresh_category_monthly_view():
+    """Пересчитать помесячные суммы по категориям (без блокировки чтения)."""
+    if engine.dialect.name != "postgresql":
+        return
+    async with engine.begin() as conn:
+        await conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {CATEGORY_MONTHLY_VIEW}"))
+
+
+async def create_missing_indexes():
+    """
+    Досоздать индексы, добавленные в модели после создания таблиц (create_all их не трогает).
+    CREATE INDEX CONCURRENTLY — запись в transactions на время построения не блокируется.
+    """
+    await create_missing_indexes_concurrently(
+        engine, Transaction_Base.metadata, lock_name="transactions_service:indexes"
+    )
+
+
 # Асинхронное закрытие соединений при остановке
 async def shutdown():
     await engine.dispose()
\ No newline at end of file
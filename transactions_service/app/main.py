@@ -1,23 +1,35 @@
 import asyncio
+import logging
+import os
 from contextlib import asynccontextmanager
 
 import uvicorn
 from app.cache import cache_client
-from app.database import AsyncSessionLocal, create_tables
+from app.database import (
+    AsyncSessionLocal,
+    create_missing_indexes,
+    create_tables,
+    refresh_category_monthly_view,
+    warm_up_pool,
+)
 from app.event_listener import EventListener
 from app.models import *  # noqa: F403
 from app.repository.sync_repository import SyncRepository
 from app.routers import sync, transactions
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from shared.event_publisher import EventPublisher
 from shared.logging import LoggingMiddleware, setup_logging
 
 setup_logging(service_name="transactions-service")
+logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
@@ -28,30 +40,53 @@ async def periodic_sync():
         repo = SyncRepository(db)
         try:
             result = await repo.sync_incremental()
-            print(f"[SCHEDULER] Incremental sync: {result['synced']}")
+            logger.info(f"[SCHEDULER] Incremental sync: {result['synced']}")
         except Exception as e:
-            print(f"[SCHEDULER] Error: {e}")
+            logger.error(f"[SCHEDULER] Error: {e}", exc_info=True)
+
+
+async def periodic_refresh_monthly_summary():
+    try:
+        await refresh_category_monthly_view()
+        logger.info("[SCHEDULER] Monthly category summary refreshed")
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Monthly summary refresh error: {e}", exc_info=True)
+
+
+# Индексы на существующей таблице строятся в фоне (CONCURRENTLY): сервис принимает запросы, не дожидаясь их
+async def build_missing_indexes():
+    try:
+        await create_missing_indexes()
+        logger.info("[LIFESPAN] Missing indexes checked")
+    except Exception as e:
+        logger.error(f"[LIFESPAN] Index build error: {e}", exc_info=True)
 
 
 @asynccontextmanager
 async def life_span(app: FastAPI):
-    print("[LIFESPAN] Starting up...")
+    logger.info("[LIFESPAN] Starting up...")
 
     await cache_client.connect()
     await EventPublisher.connect()
     await create_tables()
+    index_task = asyncio.create_task(build_missing_indexes())
+    try:
+        await warm_up_pool()
+    except Exception as e:
+        logger.warning(f"[LIFESPAN] Pool warm-up failed: {e}")
 
     try:
         async with AsyncSessionLocal() as db:
             repo = SyncRepository(db)
             result = await repo.sync_incremental()
-            print(f"[LIFESPAN] Initial sync: {result['synced']}")
+            logger.info(f"[LIFESPAN] Initial sync: {result['synced']}")
     except Exception as e:
-        print(f"[LIFESPAN] Initial sync failed: {e}")
+        logger.warning(f"[LIFESPAN] Initial sync failed: {e}")
 
     scheduler.add_job(periodic_sync, IntervalTrigger(minutes=10))
+    scheduler.add_job(periodic_refresh_monthly_summary, CronTrigger(hour=3))
     scheduler.start()
-    print("[LIFESPAN] Scheduler started (sync every 10 minutes)")
+    logger.info("[LIFESPAN] Scheduler started (sync every 10 minutes, monthly summary refresh nightly)")
 
     event_listener = EventListener()
     listener_task = asyncio.create_task(event_listener.listen())
@@ -59,7 +94,9 @@ async def life_span(app: FastAPI):
 
     yield
 
-    print("[LIFESPAN] Shutting down...")
+    logger.info("[LIFESPAN] Shutting down...")
+    if not index_task.done():
+        index_task.cancel()
     if not listener_task.done():
         listener_task.cancel()
         try:
@@ -69,23 +106,44 @@ async def life_span(app: FastAPI):
     await cache_client.close()
     await EventPublisher.close()
     scheduler.shutdown(wait=False)
-    print("[LIFESPAN] Scheduler stopped")
+    logger.info("[LIFESPAN] Scheduler stopped")
 
 
-app = FastAPI(title="Transactions", lifespan=life_span)
+# Списки транзакций с вложенными категориями/мерчантами сериализуются orjson
+app = FastAPI(title="Transactions", lifespan=life_span, default_response_class=ORJSONResponse)
 
+# Сжимаем только ответы от 1 КБ (списки транзакций и категорий).
+# Добавляется раньше LoggingMiddleware, чтобы видеть ответ целиком, а не потоком чанков
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 app.add_middleware(LoggingMiddleware)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Сервис внутренний и вызывается только gateway, браузер сюда не ходит.
+# CORS включается лишь при явном списке origin'ов в CORS_ORIGINS (через запятую) — "*" с credentials браузеры отвергают
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()]
+if CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PATCH"],
+        allow_headers=["Content-Type", "X-User-ID"],
+    )
 
-app.include_router(transactions.router)
+
+async def unhandled_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
+    """
+    Единая обработка непредвиденных ошибок вместо try/except в каждом эндпоинте:
+    трейсбек — в лог, клиенту — 500 без деталей реализации.
+    """
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
+    return ORJSONResponse(status_code=500, content={"detail": "Internal server error"})
+
+
+app.add_exception_handler(Exception, unhandled_exception_handler)
+
+# sync — первым: его GET /transactions/last_sync должен проверяться раньше GET /transactions/{transaction_id}
 app.include_router(sync.router)
+app.include_router(transactions.router)
 
 Instrumentator().instrument(app).expose(app, endpoint="/metrics")
 
@@ -96,4 +154,4 @@ async def health():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    uvicorn.run(app, host="0.0.0.0", port=8002, loop="uvloop", http="httptools")
@@ -1,4 +1,5 @@
 import uuid
+from typing import Optional
 
 from sqlalchemy import (
     DECIMAL,
@@ -7,6 +8,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     func,
@@ -86,19 +88,43 @@ class Transaction(Transaction_Base):
 
     id = Column(UUID(as_uuid=True), default=uuid.uuid4, nullable=False, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False, index=True)
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False, index=True)
     bank_account_id = Column(Integer, ForeignKey("bank_accounts.id"), nullable=False)
     amount = Column(DECIMAL(12, 2), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     type = Column(String(30), nullable=False)
     description = Column(String(200), nullable=True)
-    merchant_id = Column(Integer, ForeignKey("merchants.id"), nullable=True)
+    merchant_id = Column(Integer, ForeignKey("merchants.id"), nullable=True, index=True)
 
     bank_account = relationship("Bank_Account", back_populates="transactions")
     merchant = relationship("Merchant", back_populates="transactions")
     category = relationship("Category", back_populates="transactions")
 
+    __table_args__ = (
+        # Лента пользователя: WHERE user_id = ? ORDER BY created_at DESC LIMIT ? — без сортировки в памяти.
+        # INCLUDE — все колонки, которые читает список: страница отдаётся index-only scan без обращения к таблице
+        Index(
+            "ix_transactions_user_created_at",
+            "user_id",
+            created_at.desc(),
+            postgresql_include=["id", "bank_account_id", "category_id", "merchant_id", "amount", "type", "description"],
+        ),
+        # Та же лента с фильтром по типу (доходы/расходы): WHERE user_id = ? AND type = ? ORDER BY created_at DESC
+        Index("ix_transactions_user_type_created_at", "user_id", "type", created_at.desc()),
+        # Сводка по категориям: WHERE user_id = ? GROUP BY category_id
+        Index("ix_transactions_user_category", "user_id", "category_id"),
+    )
+
     def category_group(self) -> str:
         if self.category is None:
             return "Unknown"
         return self.category.name
+
+    # Плоские имена для TransactionResponse (from_attributes): связи должны быть загружены заранее
+    @property
+    def category_name(self) -> Optional[str]:
+        return self.category.name if self.category is not None else None
+
+    @property
+    def merchant_name(self) -> Optional[str]:
+        return self.merchant.name if self.merchant is not None else None
@@ -5,7 +5,14 @@ from typing import Dict
 from uuid import uuid4
 
 import httpx
-from app.cache import cache_client
+from app.cache import (
+    CATEGORIES_ALL_KEY,
+    CATEGORIES_EXPENSE_KEY,
+    CATEGORIES_INCOME_KEY,
+    cache_client,
+    categories_pattern,
+    transactions_list_pattern,
+)
 from app.models import Bank, Bank_Account, Category, MCC_Category, Merchant, Transaction
 from sqlalchemy import select, update
 from sqlalchemy.dialects.postgresql import insert
@@ -224,9 +231,21 @@ class SyncRepository:
         )
 
         await self.db.commit()
+        await self._invalidate_caches(user_id, stats)
 
         return stats
 
+    async def _invalidate_caches(self, user_id: int, stats: Dict[str, int]) -> None:
+        """Сброс кэшей, которые устарели после синхронизации: списки транзакций пользователя и справочник категорий."""
+        try:
+            if stats["transactions"]:
+                await cache_client.delete_pattern(transactions_list_pattern(user_id))
+            if stats["categories"]:
+                await cache_client.redis.delete(CATEGORIES_ALL_KEY, CATEGORIES_INCOME_KEY, CATEGORIES_EXPENSE_KEY)
+                await cache_client.delete_pattern(categories_pattern())
+        except Exception as e:
+            logger.warning(f"[SYNC] Не удалось сбросить кэш после синхронизации: {e}")
+
     async def rename_bank_account(self, bank_account_hash: str, new_name: str) -> bool:
         """Переименовать банковский счёт по хэшу. Возвращает True если счёт найден."""
         result = await self.db.execute(
@@ -286,7 +305,7 @@ class SyncRepository:
                 total["success"] += 1
                 total["transactions"] += stats["transactions"]
             except Exception as e:
-                print(f"Failed to sync {acc_hash} for user {user_id}: {e}")
+                logger.warning(f"[SYNC] Не удалось синхронизировать счёт {acc_hash} пользователя {user_id}: {e}")
                 total["failed"] += 1
 
         if total["success"] > 0:
@@ -322,7 +341,7 @@ class SyncRepository:
                 await self.sync_by_account(acc_hash, user_id)
                 total["success"] += 1
             except Exception as e:
-                print(f"Failed to sync {acc_hash} for user {user_id}: {e}")
+                logger.warning(f"[SYNC] Не удалось синхронизировать счёт {acc_hash} пользователя {user_id}: {e}")
                 total["failed"] += 1
 
         return {"synced": total}
@@ -1,10 +1,33 @@
+import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from app.models import Category, Transaction
-from sqlalchemy import func, select
+from app.database import CATEGORY_MONTHLY_VIEW
+from app.models import Category, Merchant, Transaction
+from sqlalchemy import column, func, select, table, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, raiseload
+
+# Материализованное представление с помесячными суммами (создаётся в create_tables, только Postgres)
+_category_monthly = table(
+    CATEGORY_MONTHLY_VIEW,
+    column("user_id"),
+    column("month"),
+    column("category_id"),
+    column("type"),
+    column("total_amount"),
+    column("transaction_count"),
+)
+
+
+def _pad_ids(ids: List[int]) -> List[int]:
+    """
+    Дополняет список ID до ближайшей степени двойки повтором первого элемента (для IN это ничего не меняет).
+    SQL с развёрнутым IN зависит от длины списка; так число разных текстов запроса — и подготовленных
+    выражений asyncpg на соединение — ограничено ~log2 от максимальной длины.
+    """
+    size = 1 << (len(ids) - 1).bit_length()
+    return ids + [ids[0]] * (size - len(ids))
 
 
 class TransactionRepository:
@@ -24,6 +47,8 @@ class TransactionRepository:
         bank_account_ids: Optional[List[int]] = None,
         limit: int = 50,
         offset: int = 0,
+        after_created_at: Optional[datetime] = None,
+        after_id: Optional[uuid.UUID] = None,
     ):
         """
         Получение транзакций с фильтрацией.
@@ -39,21 +64,38 @@ class TransactionRepository:
             merchant_ids: Список ID мерчантов
             limit: Лимит записей
             offset: Смещение
+            after_created_at, after_id: Курсор — последняя транзакция предыдущей страницы
 
         Returns:
-            Список транзакций
+            Список строк (RowMapping) с полями TransactionResponse
         """
+        # Только нужные колонки, без ORM-объектов: на страницу из сотни строк не создаются
+        # экземпляры Transaction/Category/Merchant и не заполняется identity map
         query = (
-            select(Transaction)
+            select(
+                Transaction.id,
+                Transaction.user_id,
+                Transaction.bank_account_id,
+                Transaction.category_id,
+                Category.name.label("category_name"),
+                Transaction.amount,
+                Transaction.created_at,
+                Transaction.type,
+                Transaction.description,
+                Transaction.merchant_id,
+                Merchant.name.label("merchant_name"),
+            )
+            .outerjoin(Category, Transaction.category_id == Category.id)
+            .outerjoin(Merchant, Transaction.merchant_id == Merchant.id)
             .where(Transaction.user_id == user_id)
-            .options(joinedload(Transaction.category), joinedload(Transaction.merchant))
         )
 
         if transaction_type:
             query = query.where(Transaction.type == transaction_type)
 
+        # Пустой список, как и None, означает «без фильтра»: IN () не строится и лишнего запроса нет
         if category_ids:
-            query = query.where(Transaction.category_id.in_(category_ids))
+            query = query.where(Transaction.category_id.in_(_pad_ids(category_ids)))
 
         if start_date:
             query = query.where(Transaction.created_at >= start_date)
@@ -68,15 +110,21 @@ class TransactionRepository:
             query = query.where(Transaction.amount <= max_amount)
 
         if merchant_ids:
-            query = query.where(Transaction.merchant_id.in_(merchant_ids))
+            query = query.where(Transaction.merchant_id.in_(_pad_ids(merchant_ids)))
 
         if bank_account_ids:
-            query = query.where(Transaction.bank_account_id.in_(bank_account_ids))
+            query = query.where(Transaction.bank_account_id.in_(_pad_ids(bank_account_ids)))
 
-        query = query.order_by(Transaction.created_at.desc()).limit(limit).offset(offset)
+        if after_created_at is not None and after_id is not None:
+            # Keyset-пагинация: следующая страница начинается сразу за курсором, без пропуска offset строк
+            # Типы колонок передаются явно: иначе значения курсора биндятся по типу Python, а не колонки
+            cursor = tuple_(after_created_at, after_id, types=[Transaction.created_at.type, Transaction.id.type])
+            query = query.where(tuple_(Transaction.created_at, Transaction.id) < cursor)
+
+        query = query.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit).offset(offset)
 
         result = await self.db.execute(query)
-        return result.scalars().unique().all()
+        return result.mappings().all()
 
     async def get_all_categories(self, type: Optional[str] = None) -> List[Category]:
         """
@@ -110,14 +158,13 @@ class TransactionRepository:
             select(Transaction)
             .where(Transaction.id == transaction_id)
             .where(Transaction.user_id == user_id)
-            .options(joinedload(Transaction.category), joinedload(Transaction.merchant))
+            # raiseload("*"): обращение к незагруженной связи (bank_account) — ошибка, а не скрытый ленивый запрос
+            .options(joinedload(Transaction.category), joinedload(Transaction.merchant), raiseload("*"))
         )
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
-    async def update_transaction_category(
-        self, transaction_id: str, user_id: int, category_id: int
-    ) -> Optional[Transaction]:
+    async def update_transaction_category(self, transaction_id: str, user_id: int, category_id: int):
         """
         Изменить категорию транзакции.
 
@@ -127,15 +174,40 @@ class TransactionRepository:
             category_id: ID новой категории
 
         Returns:
-            Обновлённая транзакция или None если не найдена
+            Строка (Row) с полями TransactionResponse или None, если транзакция не найдена
         """
-        transaction = await self.get_transaction_by_id(transaction_id, user_id)
+        # Один UPDATE ... RETURNING: поля ответа (и имена категории/мерчанта — скалярными подзапросами
+        # по новой строке) возвращает сам UPDATE, без повторного SELECT транзакции
+        result = await self.db.execute(
+            update(Transaction)
+            .where(Transaction.id == transaction_id)
+            .where(Transaction.user_id == user_id)
+            .values(category_id=category_id)
+            .returning(
+                Transaction.id,
+                Transaction.user_id,
+                Transaction.bank_account_id,
+                Transaction.category_id,
+                select(Category.name)
+                .where(Category.id == Transaction.category_id)
+                .scalar_subquery()
+                .label("category_name"),
+                Transaction.amount,
+                Transaction.created_at,
+                Transaction.type,
+                Transaction.description,
+                Transaction.merchant_id,
+                select(Merchant.name)
+                .where(Merchant.id == Transaction.merchant_id)
+                .scalar_subquery()
+                .label("merchant_name"),
+            )
+        )
+        transaction = result.one_or_none()
         if transaction is None:
             return None
-        transaction.category_id = category_id
-        await self.db.flush()
-        self.db.expire(transaction)
-        return await self.get_transaction_by_id(transaction_id, user_id)
+        await self.db.commit()
+        return transaction
 
     async def get_category_summary(
         self,
@@ -168,6 +240,43 @@ class TransactionRepository:
         result = await self.db.execute(query)
         return result.all()
 
+    async def get_category_monthly_summary(
+        self,
+        user_id: int,
+        transaction_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> list:
+        """
+        Суммы по категориям с разбивкой по месяцам — из материализованного представления, без сканирования транзакций.
+        Месяц попадает в выборку, если его начало лежит в [начало месяца start_date; end_date].
+        """
+        mv = _category_monthly
+        query = (
+            select(
+                mv.c.month,
+                mv.c.category_id,
+                Category.name.label("category_name"),
+                func.sum(mv.c.total_amount).label("total_amount"),
+                func.sum(mv.c.transaction_count).label("transaction_count"),
+            )
+            .join(Category, mv.c.category_id == Category.id)
+            .where(mv.c.user_id == user_id)
+            .group_by(mv.c.month, mv.c.category_id, Category.name)
+            .order_by(mv.c.month.desc(), func.sum(mv.c.total_amount).desc())
+        )
+
+        if transaction_type:
+            query = query.where(mv.c.type == transaction_type)
+        if start_date:
+            month_start = start_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            query = query.where(mv.c.month >= month_start)
+        if end_date:
+            query = query.where(mv.c.month <= end_date)
+
+        result = await self.db.execute(query)
+        return result.all()
+
     async def get_category_by_id(self, category_id: int) -> Optional[Category]:
         """
         Получение категории по ID.
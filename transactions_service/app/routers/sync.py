@@ -3,14 +3,17 @@ import logging
 from app.database import get_db
 from app.dependencies import get_user_id_from_header
 from app.repository.sync_repository import SyncRepository
-from app.routers.transactions import router
 from app.schemas import SyncTriggerRequest
-from fastapi import Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+# Тот же префикс, что у транзакций; в main.py подключается раньше роутера транзакций,
+# иначе GET /transactions/last_sync перехватил бы маршрут GET /transactions/{transaction_id}
+router = APIRouter(prefix="/transactions", tags=["sync"])
+
 
 class SyncUserAccountsRequest(BaseModel):
     user_id: int
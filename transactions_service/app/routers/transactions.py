@@ -1,3 +1,4 @@
+import logging
 import uuid
 from datetime import datetime
 from typing import List, Optional
@@ -7,13 +8,17 @@ from app.cache import (
     CATEGORIES_EXPENSE_KEY,
     CATEGORIES_INCOME_KEY,
     CATEGORIES_TTL,
+    TRANSACTIONS_LIST_TTL,
     cache_client,
     category_by_id_key,
+    transactions_list_key,
+    transactions_list_pattern,
 )
 from app.database import get_db
 from app.dependencies import get_user_id_from_header
 from app.repository.transactions_repository import TransactionRepository
 from app.schemas import (
+    CategoryMonthlySummaryResponse,
     CategoryResponse,
     CategorySummaryRequest,
     CategorySummaryResponse,
@@ -21,14 +26,20 @@ from app.schemas import (
     TransactionResponse,
     UpdateTransactionCategoryRequest,
 )
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared.event_publisher import EventPublisher
 from shared.event_schema import DomainEvent
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+# Сериализатор списка без валидации: строки из нашей БД уже соответствуют TransactionResponse
+_transaction_list_adapter = TypeAdapter(List[TransactionResponse])
+
 
 @router.post(
     "/",
@@ -51,45 +62,45 @@ async def get_transactions(
     - min_amount, max_amount: диапазон сумм
     - merchant_ids: список ID мерчантов
     - limit, offset: пагинация
+    - after_created_at, after_id: курсор keyset-пагинации (последняя транзакция предыдущей страницы)
     """
+    # Cache-Aside: один и тот же набор фильтров пользователя в пределах TTL отдаётся из Redis
+    cache_key = transactions_list_key(user_id, filters.model_dump_json())
     try:
-        repo = TransactionRepository(db)
-        transactions = await repo.get_transactions_with_filters(
-            user_id=user_id,
-            transaction_type=filters.transaction_type,
-            category_ids=filters.category_ids,
-            start_date=filters.start_date,
-            end_date=filters.end_date,
-            min_amount=filters.min_amount,
-            max_amount=filters.max_amount,
-            merchant_ids=filters.merchant_ids,
-            bank_account_ids=filters.bank_account_ids,
-            limit=filters.limit,
-            offset=filters.offset,
-        )
-
-        result = []
-        for t in transactions:
-            result.append(
-                {
-                    "id": t.id,
-                    "user_id": t.user_id,
-                    "bank_account_id": t.bank_account_id,
-                    "category_id": t.category_id,
-                    "category_name": t.category.name if t.category else None,
-                    "amount": t.amount,
-                    "created_at": t.created_at,
-                    "type": t.type,
-                    "description": t.description,
-                    "merchant_id": t.merchant_id,
-                    "merchant_name": t.merchant.name if t.merchant else None,
-                }
-            )
-
-        return result
+        cached = await cache_client.get_raw(cache_key)
+    except Exception as e:
+        # Недоступный Redis не ломает чтение — идём в БД
+        logger.warning(f"Не удалось прочитать кэш списка транзакций пользователя {user_id}: {e}")
+        cached = None
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    repo = TransactionRepository(db)
+    transactions = await repo.get_transactions_with_filters(
+        user_id=user_id,
+        transaction_type=filters.transaction_type,
+        category_ids=filters.category_ids,
+        start_date=filters.start_date,
+        end_date=filters.end_date,
+        min_amount=filters.min_amount,
+        max_amount=filters.max_amount,
+        merchant_ids=filters.merchant_ids,
+        bank_account_ids=filters.bank_account_ids,
+        limit=filters.limit,
+        offset=filters.offset,
+        after_created_at=filters.after_created_at,
+        after_id=filters.after_id,
+    )
+
+    # Данные из нашей БД доверенные: model_construct без валидации, готовый JSON отдаётся и кэшируется как есть
+    # (response_model остаётся для документации OpenAPI)
+    body = _transaction_list_adapter.dump_json([TransactionResponse.model_construct(**row) for row in transactions])
 
+    try:
+        await cache_client.set_raw(cache_key, body.decode(), ttl=TRANSACTIONS_LIST_TTL)
     except Exception as e:
-        raise HTTPException(500, f"Internal server error: {str(e)}")
+        logger.warning(f"Не удалось сохранить кэш списка транзакций пользователя {user_id}: {e}")
+    return Response(content=body, media_type="application/json")
 
 
 @router.patch(
@@ -110,50 +121,39 @@ async def update_transaction_category(
     - **transaction_id**: UUID транзакции
     - **category_id**: ID новой категории
     """
-    try:
-        repo = TransactionRepository(db)
-
-        category = await repo.get_category_by_id(body.category_id)
-        if not category:
-            raise HTTPException(404, f"Category {body.category_id} not found")
-
-        transaction = await repo.update_transaction_category(transaction_id, user_id, body.category_id)
-        if not transaction:
-            raise HTTPException(404, f"Transaction {transaction_id} not found")
-
-        await EventPublisher().publish(
-            DomainEvent(
-                event_id=uuid.uuid4(),
-                event_type="transaction.category.updated",
-                source="transactions-service",
-                timestamp=datetime.now(),
-                payload={
-                    "user_id": user_id,
-                    "transaction_id": str(transaction_id),
-                    "old_category_name": category.name,
-                    "new_category_name": transaction.category.name if transaction.category else str(body.category_id),
-                },
-            )
-        )
+    repo = TransactionRepository(db)
 
-        return {
-            "id": transaction.id,
-            "user_id": transaction.user_id,
-            "bank_account_id": transaction.bank_account_id,
-            "category_id": transaction.category_id,
-            "category_name": transaction.category.name if transaction.category else None,
-            "amount": float(transaction.amount),
-            "created_at": transaction.created_at,
-            "type": transaction.type,
-            "description": transaction.description,
-            "merchant_id": transaction.merchant_id,
-            "merchant_name": transaction.merchant.name if transaction.merchant else None,
-        }
+    category = await repo.get_category_by_id(body.category_id)
+    if not category:
+        raise HTTPException(404, f"Category {body.category_id} not found")
+
+    transaction = await repo.update_transaction_category(transaction_id, user_id, body.category_id)
+    if not transaction:
+        raise HTTPException(404, f"Transaction {transaction_id} not found")
 
-    except HTTPException:
-        raise
+    # Закэшированные списки пользователя содержат старую категорию.
+    # Изменение уже закоммичено: недоступность Redis не должна превращать его в 500 (клиент повторил бы запрос)
+    try:
+        await cache_client.delete_pattern(transactions_list_pattern(user_id))
     except Exception as e:
-        raise HTTPException(500, f"Internal server error: {str(e)}")
+        logger.warning(f"Не удалось сбросить кэш списков транзакций пользователя {user_id}: {e}")
+
+    await EventPublisher().publish(
+        DomainEvent(
+            event_id=uuid.uuid4(),
+            event_type="transaction.category.updated",
+            source="transactions-service",
+            timestamp=datetime.now(),
+            payload={
+                "user_id": user_id,
+                "transaction_id": str(transaction_id),
+                "old_category_name": category.name,
+                "new_category_name": transaction.category_name or str(body.category_id),
+            },
+        )
+    )
+
+    return TransactionResponse.model_validate(transaction)
 
 
 @router.get(
@@ -186,32 +186,28 @@ async def get_categories(
         cache_key = CATEGORIES_ALL_KEY
 
     # Cache-Aside: пробуем получить из кэша
-    cached = await cache_client.get(cache_key)
+    cached = await cache_client.get_raw(cache_key)
     if cached is not None:
-        return cached
+        return Response(content=cached, media_type="application/json")
 
     # Промах кэша -> запрос в БД
-    try:
-        repo = TransactionRepository(db)
-        categories = await repo.get_all_categories(type=type)
-
-        # Сериализуем в dict для кэширования
-        result = [
-            {
-                "id": cat.id,
-                "name": cat.name,
-                "type": cat.type,
-            }
-            for cat in categories
-        ]
+    repo = TransactionRepository(db)
+    categories = await repo.get_all_categories(type=type)
+
+    # Сериализуем в dict для кэширования
+    result = [
+        {
+            "id": cat.id,
+            "name": cat.name,
+            "type": cat.type,
+        }
+        for cat in categories
+    ]
 
-        # Сохраняем в кэш
-        await cache_client.set(cache_key, result, ttl=CATEGORIES_TTL)
+    # Сохраняем в кэш
+    await cache_client.set(cache_key, result, ttl=CATEGORIES_TTL)
 
-        return result
-
-    except Exception as e:
-        raise HTTPException(500, f"Internal server error: {str(e)}")
+    return result
 
 
 @router.post(
@@ -225,25 +221,52 @@ async def get_category_summary(
     user_id: int = Depends(get_user_id_from_header),
     db: AsyncSession = Depends(get_db),
 ):
-    try:
-        repo = TransactionRepository(db)
-        rows = await repo.get_category_summary(
-            user_id=user_id,
-            transaction_type=filters.transaction_type,
-            start_date=filters.start_date,
-            end_date=filters.end_date,
-        )
-        return [
-            {
-                "category_id": row.category_id,
-                "category_name": row.category_name,
-                "total_amount": float(row.total_amount),
-                "transaction_count": row.transaction_count,
-            }
-            for row in rows
-        ]
-    except Exception as e:
-        raise HTTPException(500, f"Internal server error: {str(e)}")
+    repo = TransactionRepository(db)
+    rows = await repo.get_category_summary(
+        user_id=user_id,
+        transaction_type=filters.transaction_type,
+        start_date=filters.start_date,
+        end_date=filters.end_date,
+    )
+    return [
+        {
+            "category_id": row.category_id,
+            "category_name": row.category_name,
+            "total_amount": float(row.total_amount),
+            "transaction_count": row.transaction_count,
+        }
+        for row in rows
+    ]
+
+
+@router.post(
+    "/categories/monthly",
+    response_model=List[CategoryMonthlySummaryResponse],
+    summary="Суммы транзакций по категориям помесячно",
+    description="Суммы и количество операций по категориям с разбивкой по месяцам (новые месяцы первыми). Данные берутся из материализованного представления, которое пересчитывается раз в сутки.",
+)
+async def get_category_monthly_summary(
+    filters: CategorySummaryRequest,
+    user_id: int = Depends(get_user_id_from_header),
+    db: AsyncSession = Depends(get_db),
+):
+    repo = TransactionRepository(db)
+    rows = await repo.get_category_monthly_summary(
+        user_id=user_id,
+        transaction_type=filters.transaction_type,
+        start_date=filters.start_date,
+        end_date=filters.end_date,
+    )
+    return [
+        {
+            "month": row.month,
+            "category_id": row.category_id,
+            "category_name": row.category_name,
+            "total_amount": float(row.total_amount),
+            "transaction_count": row.transaction_count,
+        }
+        for row in rows
+    ]
 
 
 @router.get(
@@ -260,41 +283,23 @@ async def get_category_by_id(
     cache_key = category_by_id_key(category_id)
 
     # Cache-Aside
-    cached = await cache_client.get(cache_key)
+    cached = await cache_client.get_raw(cache_key)
     if cached is not None:
-        return cached
-
-    try:
-        repo = TransactionRepository(db)
-        category = await repo.get_category_by_id(category_id)
-        if not category:
-            raise HTTPException(404, f"Category {category_id} not found")
-
-        result = {
-            "id": category.id,
-            "name": category.name,
-            "type": category.type,
-        }
-
-        await cache_client.set(cache_key, result, ttl=CATEGORIES_TTL)
-        return result
+        return Response(content=cached, media_type="application/json")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(500, f"Internal server error: {str(e)}")
+    repo = TransactionRepository(db)
+    category = await repo.get_category_by_id(category_id)
+    if not category:
+        raise HTTPException(404, f"Category {category_id} not found")
 
+    result = {
+        "id": category.id,
+        "name": category.name,
+        "type": category.type,
+    }
 
-@router.get("/last_sync", summary="Время последней синхронизации счетов")
-async def get_last_sync(
-    user_id: int = Depends(get_user_id_from_header),
-    db: AsyncSession = Depends(get_db),
-):
-    """Возвращает время последней синхронизации для каждого счёта пользователя."""
-    from app.repository.sync_repository import SyncRepository
-
-    repo = SyncRepository(db)
-    return await repo.get_last_sync_times(user_id)
+    await cache_client.set(cache_key, result, ttl=CATEGORIES_TTL)
+    return result
 
 
 @router.get(
@@ -307,29 +312,9 @@ async def get_transaction_by_id(
     transaction_id: str, user_id: int = Depends(get_user_id_from_header), db: AsyncSession = Depends(get_db)
 ):
     """Получить транзакцию по ID без кэширования"""
-    try:
-        repo = TransactionRepository(db)
-        transaction = await repo.get_transaction_by_id(transaction_id, user_id)
-        if not transaction:
-            raise HTTPException(404, f"Transaction {transaction_id} not found")
-
-        result = {
-            "id": transaction.id,
-            "user_id": transaction.user_id,
-            "bank_account_id": transaction.bank_account_id,
-            "category_id": transaction.category_id,
-            "category_name": transaction.category.name if transaction.category else None,
-            "amount": float(transaction.amount),
-            "created_at": transaction.created_at,
-            "type": transaction.type,
-            "description": transaction.description,
-            "merchant_id": transaction.merchant_id,
-            "merchant_name": transaction.merchant.name if transaction.merchant else None,
-        }
+    repo = TransactionRepository(db)
+    transaction = await repo.get_transaction_by_id(transaction_id, user_id)
+    if not transaction:
+        raise HTTPException(404, f"Transaction {transaction_id} not found")
 
-        return result
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(500, f"Internal server error: {str(e)}")
+    return TransactionResponse.model_validate(transaction)
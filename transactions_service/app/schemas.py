@@ -2,7 +2,10 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+# Допустимые типы транзакций: проверка членства без создания списка на каждый вызов валидатора
+_TRANSACTION_TYPES = frozenset({"income", "expense"})
 
 # ===========================
 # Request Schemas
@@ -22,14 +25,22 @@ class TransactionFilterRequest(BaseModel):
     bank_account_ids: Optional[List[int]] = Field(None, description="Список ID банковских счетов")
     limit: int = Field(..., ge=1, le=1000)
     offset: int = Field(0, ge=0)
+    after_created_at: Optional[datetime] = Field(None, description="Курсор: created_at последней транзакции страницы")
+    after_id: Optional[uuid.UUID] = Field(None, description="Курсор: id последней транзакции страницы")
 
     @field_validator("transaction_type")
     @classmethod
     def validate_type(cls, v):
-        if v is not None and v not in ["income", "expense"]:
+        if v is not None and v not in _TRANSACTION_TYPES:
             raise ValueError('Type must be "income" or "expense"')
         return v
 
+    @model_validator(mode="after")
+    def validate_cursor(self):
+        if (self.after_created_at is None) != (self.after_id is None):
+            raise ValueError("after_created_at and after_id must be passed together")
+        return self
+
 
 # ===========================
 # Response Schemas
@@ -101,7 +112,7 @@ class CategorySummaryRequest(BaseModel):
     @field_validator("transaction_type")
     @classmethod
     def validate_type(cls, v):
-        if v is not None and v not in ["income", "expense"]:
+        if v is not None and v not in _TRANSACTION_TYPES:
             raise ValueError('Type must be "income" or "expense"')
         return v
 
@@ -117,6 +128,16 @@ class CategorySummaryResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CategoryMonthlySummaryResponse(BaseModel):
+    """Сумма транзакций по одной категории за один месяц"""
+
+    month: datetime
+    category_id: int
+    category_name: str
+    total_amount: float
+    transaction_count: int
+
+
 class SyncTriggerRequest(BaseModel):
     bank_account_hash: str
     user_id: int
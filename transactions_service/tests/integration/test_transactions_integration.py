@@ -3,7 +3,9 @@ from datetime import datetime
 
 import pytest
 from app.models import Bank, Bank_Account, Category, Merchant, Transaction
+from app.repository.transactions_repository import TransactionRepository
 from httpx import AsyncClient
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -98,6 +100,56 @@ async def test_get_transactions_with_filters(client: AsyncClient, db_session: As
     assert tx_data["bank_account_id"] == 1
 
 
+@pytest.mark.asyncio
+async def test_get_transactions_keyset_pagination(client: AsyncClient, db_session: AsyncSession):
+    """Тест: вторая страница по курсору (created_at, id) продолжает первую без пропусков и повторов"""
+    bank = Bank(id=1, name="Test Bank")
+    category = Category(id=10, name="Groceries")
+    account = Bank_Account(
+        id=1,
+        user_id=123,
+        bank_account_hash="hash_123",
+        bank_account_name="Main",
+        bank_id=1,
+        currency="RUB",
+        balance=1000.00,
+    )
+    transactions = [
+        Transaction(
+            id=uuid.uuid4(),
+            user_id=123,
+            category_id=10,
+            bank_account_id=1,
+            amount=100.00 * day,
+            type="expense",
+            created_at=datetime(2023, 1, day, 12, 0, 0),
+        )
+        for day in range(1, 4)
+    ]
+    db_session.add_all([bank, category, account, *transactions])
+    await db_session.flush()
+
+    first_page = (await client.post("/transactions/", json={"limit": 2})).json()
+    last = first_page[-1]
+    second_page = (
+        await client.post(
+            "/transactions/",
+            json={"limit": 2, "after_created_at": last["created_at"], "after_id": last["id"]},
+        )
+    ).json()
+
+    assert [tx["amount"] for tx in first_page] == [300.00, 200.00]
+    assert [tx["amount"] for tx in second_page] == [100.00]
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_cursor_requires_both_fields(client: AsyncClient):
+    """Тест: курсор без after_id отклоняется валидацией"""
+    response = await client.post("/transactions/", json={"limit": 2, "after_created_at": "2023-01-01T12:00:00"})
+
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_update_category_success(client: AsyncClient, db_session: AsyncSession):
     """Тест: успешное изменение категории транзакции"""
@@ -568,3 +620,69 @@ async def test_filter_by_nonexistent_bank_account_returns_empty(client: AsyncCli
 
     assert response.status_code == 200
     assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_large_response_gzipped(client: AsyncClient, db_session: AsyncSession):
+    """Тест: ответы от 1 КБ сжимаются gzip, короткие — нет"""
+    db_session.add_all([Category(id=i, name=f"Category {i}") for i in range(1, 101)])
+    await db_session.flush()
+
+    response = await client.get("/transactions/categories", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 100
+
+    response = await client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_get_transaction_by_id_raises_on_unloaded_relationship(db_session: AsyncSession):
+    """Тест: связи, не загруженные явно, не подгружаются лениво — обращение к ним падает сразу"""
+    tx_id = uuid.uuid4()
+    db_session.add_all(
+        [
+            Bank(id=1, name="Bank"),
+            Category(id=1, name="Food"),
+            Bank_Account(
+                id=1,
+                user_id=123,
+                bank_account_hash="hash_raise",
+                bank_account_name="Card",
+                bank_id=1,
+                currency="RUB",
+                balance=0,
+            ),
+            Transaction(
+                id=tx_id,
+                user_id=123,
+                category_id=1,
+                bank_account_id=1,
+                amount=10.0,
+                type="expense",
+                created_at=datetime(2024, 1, 1),
+            ),
+        ]
+    )
+    await db_session.flush()
+    db_session.expunge_all()
+
+    tx = await TransactionRepository(db_session).get_transaction_by_id(str(tx_id), 123)
+
+    assert tx.category.name == "Food"
+    with pytest.raises(InvalidRequestError):
+        _ = tx.bank_account
+
+
+@pytest.mark.asyncio
+async def test_routes_registered_once_and_last_sync_not_shadowed(client: AsyncClient, db_session: AsyncSession):
+    """Тест: каждый маршрут зарегистрирован один раз, /last_sync не перехватывается маршрутом /{transaction_id}"""
+    from app.main import app
+
+    routes = [(route.path, tuple(sorted(route.methods or ()))) for route in app.routes]
+    assert len(routes) == len(set(routes))
+
+    response = await client.get("/transactions/last_sync")
+    assert response.status_code == 200
+    assert response.json() == {"oldest_synced_at": None, "accounts": []}
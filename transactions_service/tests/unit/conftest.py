@@ -34,6 +34,8 @@ def mock_cache_client():
     with patch("app.routers.transactions.cache_client") as mock:
         mock.get = AsyncMock(return_value=None)
         mock.set = AsyncMock()
+        mock.get_raw = AsyncMock(return_value=None)
+        mock.set_raw = AsyncMock()
         mock.delete = AsyncMock()
         mock.delete_pattern = AsyncMock()
         yield mock
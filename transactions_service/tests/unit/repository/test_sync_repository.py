@@ -198,3 +198,28 @@ class TestSyncRepository:
         # Приводим statement к строке и ищем UPDATE
         statement_str = str(last_call.args[0])
         assert "UPDATE" in statement_str.upper() or "update" in statement_str.lower()
+
+    @pytest.mark.asyncio
+    async def test_invalidate_caches_after_sync(self, sync_repository):
+        """Новые транзакции сбрасывают списки пользователя, новые категории — справочник категорий"""
+        with patch("app.repository.sync_repository.cache_client") as mock_cache:
+            mock_cache.delete_pattern = AsyncMock()
+            mock_cache.redis.delete = AsyncMock()
+
+            await sync_repository._invalidate_caches(42, {"transactions": 3, "categories": 2})
+
+        mock_cache.delete_pattern.assert_any_await("transactions:list:42:*")
+        mock_cache.delete_pattern.assert_any_await("categories:id:*")
+        mock_cache.redis.delete.assert_awaited_once_with("categories:all", "categories:income", "categories:expense")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_caches_nothing_new(self, sync_repository):
+        """Без новых данных кэш не трогаем"""
+        with patch("app.repository.sync_repository.cache_client") as mock_cache:
+            mock_cache.delete_pattern = AsyncMock()
+            mock_cache.redis.delete = AsyncMock()
+
+            await sync_repository._invalidate_caches(42, {"transactions": 0, "categories": 0})
+
+        mock_cache.delete_pattern.assert_not_awaited()
+        mock_cache.redis.delete.assert_not_awaited()
@@ -6,18 +6,14 @@ import pytest
 
 class TestTransactionRepository:
     @pytest.mark.asyncio
-    async def test_get_transactions_with_filters_default(
-        self, transaction_repository, mock_db_session, sample_transaction
-    ):
+    async def test_get_transactions_with_filters_default(self, transaction_repository, mock_db_session):
         """
         Тест получения транзакций с базовыми параметрами (только user_id).
         """
-        # Настройка мока результата
-        mock_scalars = MagicMock()
-        mock_scalars.unique.return_value.all.return_value = [sample_transaction]
-
+        # Репозиторий отдаёт строки-маппинги, а не ORM-объекты
+        row = {"user_id": 123, "category_name": "Products", "merchant_name": "Supermarket"}
         mock_result = MagicMock()
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.mappings.return_value.all.return_value = [row]
 
         mock_db_session.execute.return_value = mock_result
 
@@ -30,18 +26,16 @@ class TestTransactionRepository:
 
         # Проверяем, что результат тот, который вернул мок
         assert len(result) == 1
-        assert result[0].user_id == user_id
-        assert result[0].category.name == "Products"
+        assert result[0]["user_id"] == user_id
+        assert result[0]["category_name"] == "Products"
 
     @pytest.mark.asyncio
     async def test_get_transactions_with_filters_dates(self, transaction_repository, mock_db_session):
         """
         Тест фильтрации по датам. Проверяем, что фильтры применяются.
         """
-        mock_scalars = MagicMock()
-        mock_scalars.unique.return_value.all.return_value = []
         mock_result = MagicMock()
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.mappings.return_value.all.return_value = []
         mock_db_session.execute.return_value = mock_result
 
         start = datetime(2023, 1, 1)
@@ -57,13 +51,44 @@ class TestTransactionRepository:
         Тест фильтрации по диапазону суммы.
         """
         mock_result = MagicMock()
-        mock_result.scalars.return_value.unique.return_value.all.return_value = []
+        mock_result.mappings.return_value.all.return_value = []
         mock_db_session.execute.return_value = mock_result
 
         await transaction_repository.get_transactions_with_filters(user_id=1, min_amount=10.0, max_amount=100.0)
 
         mock_db_session.execute.assert_awaited_once()
 
+    @pytest.mark.asyncio
+    async def test_get_transactions_with_filters_pads_id_lists(self, transaction_repository, mock_db_session):
+        """
+        Тест: списки ID для IN дополняются до степени двойки повтором первого ID.
+        """
+        mock_result = MagicMock()
+        mock_result.mappings.return_value.all.return_value = []
+        mock_db_session.execute.return_value = mock_result
+
+        await transaction_repository.get_transactions_with_filters(user_id=1, category_ids=[5, 6, 7])
+
+        statement = mock_db_session.execute.await_args.args[0]
+        assert [5, 6, 7, 5] in statement.compile().params.values()
+
+    @pytest.mark.asyncio
+    async def test_get_transactions_with_filters_empty_id_lists_ignored(self, transaction_repository, mock_db_session):
+        """
+        Тест: пустые списки ID не превращаются в IN () — фильтр просто не применяется.
+        """
+        mock_result = MagicMock()
+        mock_result.mappings.return_value.all.return_value = []
+        mock_db_session.execute.return_value = mock_result
+
+        await transaction_repository.get_transactions_with_filters(
+            user_id=1, category_ids=[], merchant_ids=[], bank_account_ids=[]
+        )
+
+        statement = str(mock_db_session.execute.await_args.args[0])
+        assert " IN " not in statement
+        assert "1 != 1" not in statement
+
     @pytest.mark.asyncio
     async def test_get_all_categories(self, transaction_repository, mock_db_session, sample_category):
         """
@@ -124,3 +149,39 @@ class TestTransactionRepository:
 
         assert cat.id == 1
         assert cat.name == "Products"
+
+    @pytest.mark.asyncio
+    async def test_get_category_monthly_summary_reads_view(self, transaction_repository, mock_db_session):
+        """
+        Тест: помесячные суммы читаются из материализованного представления, начало периода — с начала месяца.
+        """
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+        mock_db_session.execute.return_value = mock_result
+
+        await transaction_repository.get_category_monthly_summary(user_id=1, start_date=datetime(2026, 1, 15, 10))
+
+        statement = mock_db_session.execute.await_args.args[0]
+        assert "mv_user_category_monthly" in str(statement)
+        assert "FROM transactions" not in str(statement)
+        assert datetime(2026, 1, 1) in statement.compile().params.values()
+
+    @pytest.mark.asyncio
+    async def test_update_transaction_category_single_returning(self, transaction_repository, mock_db_session):
+        """
+        Тест: смена категории — один UPDATE ... RETURNING с именем категории, без повторного SELECT.
+        """
+        row = MagicMock(category_id=2, category_name="Transport")
+        mock_result = MagicMock()
+        mock_result.one_or_none.return_value = row
+        mock_db_session.execute.return_value = mock_result
+
+        result = await transaction_repository.update_transaction_category("some-uuid", user_id=1, category_id=2)
+
+        assert result is row
+        mock_db_session.execute.assert_awaited_once()
+        statement = str(mock_db_session.execute.await_args.args[0])
+        assert statement.startswith("UPDATE transactions")
+        assert "RETURNING" in statement
+        assert "category_name" in statement
+        mock_db_session.commit.assert_awaited_once()
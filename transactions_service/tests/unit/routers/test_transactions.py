@@ -1,12 +1,15 @@
 import uuid
 from datetime import datetime
+from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from app.database import get_db
 from app.dependencies import get_user_id_from_header
-from app.models import Category, Merchant, Transaction
+from app.main import unhandled_exception_handler
+from app.models import Category, Transaction
 from app.routers import transactions
+from app.schemas import TransactionResponse
 from fastapi import FastAPI, status
 from fastapi.testclient import TestClient
 
@@ -27,39 +30,37 @@ class TestGetTransactions:
         """
         test_app = FastAPI()
         test_app.include_router(transactions.router)
+        test_app.add_exception_handler(Exception, unhandled_exception_handler)
 
         # Переопределяем зависимости
         test_app.dependency_overrides[get_db] = lambda: mock_db_session
         test_app.dependency_overrides[get_user_id_from_header] = lambda: 123
 
-        return TestClient(test_app)
+        return TestClient(test_app, raise_server_exceptions=False)
 
     @pytest.fixture
-    def sample_transaction(self):
-        """Создание примера транзакции с заполненными связями."""
-        tx_id = uuid.uuid4()
-        tx = Transaction(
-            id=tx_id,
-            user_id=123,
-            category_id=1,
-            bank_account_id=1,
-            amount=100.50,
-            created_at=datetime.now(),
-            type="expense",
-            description="Groceries",
-            merchant_id=10,
-        )
-
-        tx.category = Category(id=1, name="Products")
-        tx.merchant = Merchant(id=10, name="Supermarket")
-        return tx
+    def sample_transaction_row(self):
+        """Строка транзакции в том виде, в каком её отдаёт репозиторий (с именами категории и мерчанта)."""
+        return {
+            "id": uuid.uuid4(),
+            "user_id": 123,
+            "bank_account_id": 1,
+            "category_id": 1,
+            "category_name": "Products",
+            "amount": 100.50,
+            "created_at": datetime.now(),
+            "type": "expense",
+            "description": "Groceries",
+            "merchant_id": 10,
+            "merchant_name": "Supermarket",
+        }
 
     @pytest.mark.asyncio
-    async def test_get_transactions_success(self, client, mock_db_session, sample_transaction):
+    async def test_get_transactions_success(self, client, mock_db_session, sample_transaction_row):
         """Тест: успешное получение списка транзакций"""
         # Настраиваем мок репозитория
         mock_repo_instance = MagicMock()
-        mock_repo_instance.get_transactions_with_filters = AsyncMock(return_value=[sample_transaction])
+        mock_repo_instance.get_transactions_with_filters = AsyncMock(return_value=[sample_transaction_row])
 
         with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo_instance):
             response = client.post("/transactions/", json={"limit": 10, "offset": 0})
@@ -73,6 +74,37 @@ class TestGetTransactions:
         assert data[0]["merchant_name"] == "Supermarket"
         assert float(data[0]["amount"]) == 100.50
 
+    @pytest.mark.asyncio
+    async def test_get_transactions_survives_cache_outage(
+        self, client, mock_db_session, sample_transaction_row, mock_cache_client
+    ):
+        """Тест: недоступный Redis не ломает список — данные берутся из БД"""
+        mock_repo_instance = MagicMock()
+        mock_repo_instance.get_transactions_with_filters = AsyncMock(return_value=[sample_transaction_row])
+        mock_cache_client.get_raw.side_effect = ConnectionError("Redis is down")
+        mock_cache_client.set_raw.side_effect = ConnectionError("Redis is down")
+
+        with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo_instance):
+            response = client.post("/transactions/", json={"limit": 10, "offset": 0})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]["category_name"] == "Products"
+        mock_repo_instance.get_transactions_with_filters.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_get_transactions_serialized_like_response_model(
+        self, client, mock_db_session, sample_transaction_row
+    ):
+        """Тест: ответ без валидации совпадает с тем, что дала бы валидация через TransactionResponse"""
+        sample_transaction_row["amount"] = Decimal("100.50")
+        mock_repo_instance = MagicMock()
+        mock_repo_instance.get_transactions_with_filters = AsyncMock(return_value=[sample_transaction_row])
+
+        with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo_instance):
+            response = client.post("/transactions/", json={"limit": 10})
+
+        assert response.json() == [TransactionResponse.model_validate(sample_transaction_row).model_dump(mode="json")]
+
     @pytest.mark.asyncio
     async def test_get_transactions_empty_list(self, client, mock_db_session):
         """Тест: транзакции не найдены (пустой список)"""
@@ -135,6 +167,37 @@ class TestGetTransactions:
         called_kwargs = mock_repo_instance.get_transactions_with_filters.call_args.kwargs
         assert called_kwargs["bank_account_ids"] is None
 
+    @pytest.mark.asyncio
+    async def test_get_transactions_from_cache(self, client, mock_db_session, mock_cache_client):
+        """Тест: при попадании в кэш готовый JSON отдаётся как есть, репозиторий не вызывается"""
+        cached = (
+            '[{"id":"7be977ad-da96-4e4c-9d4f-4e8a0245d0c0","user_id":123,"bank_account_id":1,"category_id":1,'
+            '"category_name":"Products","amount":10.0,"created_at":"2024-01-15T14:30:00Z","type":"expense",'
+            '"description":null,"merchant_id":null,"merchant_name":null}]'
+        )
+        mock_cache_client.get_raw = AsyncMock(return_value=cached)
+
+        with patch("app.routers.transactions.TransactionRepository") as mock_repo_cls:
+            response = client.post("/transactions/", json={"limit": 10})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.text == cached
+        mock_repo_cls.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_transactions_result_cached_per_user(self, client, mock_db_session, mock_cache_client):
+        """Тест: результат сохраняется в кэш под ключом пользователя"""
+        mock_repo_instance = MagicMock()
+        mock_repo_instance.get_transactions_with_filters = AsyncMock(return_value=[])
+
+        with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo_instance):
+            client.post("/transactions/", json={"limit": 10})
+
+        cache_key, body = mock_cache_client.set_raw.call_args.args
+        assert cache_key.startswith("transactions:list:123:")
+        assert body == "[]"
+        assert mock_cache_client.set_raw.call_args.kwargs["ttl"] == 30
+
     @pytest.mark.asyncio
     async def test_get_transactions_internal_error(self, client, mock_db_session):
         """Тест: внутренняя ошибка сервера (Exception -> HTTP 500)"""
@@ -146,6 +209,8 @@ class TestGetTransactions:
 
         assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert "Internal server error" in response.json()["detail"]
+        # Текст исключения клиенту не отдаётся
+        assert "DB connection lost" not in response.text
 
 
 class TestGetCategories:
@@ -221,9 +286,10 @@ class TestUpdateTransactionCategory:
     def client(self, mock_db_session):
         test_app = FastAPI()
         test_app.include_router(transactions.router)
+        test_app.add_exception_handler(Exception, unhandled_exception_handler)
         test_app.dependency_overrides[get_db] = lambda: mock_db_session
         test_app.dependency_overrides[get_user_id_from_header] = lambda: 123
-        return TestClient(test_app)
+        return TestClient(test_app, raise_server_exceptions=False)
 
     @pytest.fixture
     def sample_transaction(self):
@@ -256,6 +322,36 @@ class TestUpdateTransactionCategory:
         assert data["category_id"] == 2
         assert data["category_name"] == "Transport"
 
+    @pytest.mark.asyncio
+    async def test_update_category_invalidates_cached_lists(
+        self, client, mock_db_session, sample_transaction, mock_cache_client
+    ):
+        """Тест: смена категории сбрасывает закэшированные списки транзакций пользователя"""
+        mock_repo = MagicMock()
+        mock_repo.get_category_by_id = AsyncMock(return_value=Category(id=2, name="Transport"))
+        mock_repo.update_transaction_category = AsyncMock(return_value=sample_transaction)
+
+        with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo):
+            client.patch(f"/transactions/{sample_transaction.id}/category", json={"category_id": 2})
+
+        mock_cache_client.delete_pattern.assert_awaited_once_with("transactions:list:123:*")
+
+    @pytest.mark.asyncio
+    async def test_update_category_survives_cache_outage(
+        self, client, mock_db_session, sample_transaction, mock_cache_client
+    ):
+        """Тест: недоступный Redis не превращает уже закоммиченное изменение в 500"""
+        mock_repo = MagicMock()
+        mock_repo.get_category_by_id = AsyncMock(return_value=Category(id=2, name="Transport"))
+        mock_repo.update_transaction_category = AsyncMock(return_value=sample_transaction)
+        mock_cache_client.delete_pattern.side_effect = ConnectionError("Redis is down")
+
+        with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo):
+            response = client.patch(f"/transactions/{sample_transaction.id}/category", json={"category_id": 2})
+
+        assert response.status_code == 200
+        assert response.json()["category_id"] == 2
+
     @pytest.mark.asyncio
     async def test_update_category_transaction_not_found(self, client, mock_db_session):
         """Тест: транзакция не найдена → 404"""
@@ -381,6 +477,19 @@ class TestGetTransactionById:
         assert data["bank_account_id"] == 1
         assert data["category_name"] == "Food"
 
+    @pytest.mark.asyncio
+    async def test_get_transaction_by_id_keeps_list_cache(
+        self, client, mock_db_session, sample_transaction, mock_cache_client
+    ):
+        """Тест: чтение транзакции не сбрасывает кэш списков пользователя"""
+        mock_repo_instance = MagicMock()
+        mock_repo_instance.get_transaction_by_id = AsyncMock(return_value=sample_transaction)
+
+        with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo_instance):
+            client.get(f"/transactions/{sample_transaction.id}")
+
+        mock_cache_client.delete_pattern.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_get_transaction_by_id_not_found(self, client, mock_db_session):
         """Тест: транзакция не найдена → 404"""
@@ -526,3 +635,54 @@ class TestCategorySummary:
             start_date=None,
             end_date=None,
         )
+
+
+class TestCategoryMonthlySummary:
+    """Тесты для помесячных сумм по категориям (материализованное представление)"""
+
+    @pytest.fixture
+    def client(self):
+        test_app = FastAPI()
+        test_app.include_router(transactions.router)
+        test_app.dependency_overrides[get_db] = lambda: AsyncMock()
+        test_app.dependency_overrides[get_user_id_from_header] = lambda: 123
+        return TestClient(test_app)
+
+    @pytest.mark.asyncio
+    async def test_monthly_success(self, client):
+        row = MagicMock()
+        row.month = datetime(2026, 1, 1)
+        row.category_id = 1
+        row.category_name = "Продукты"
+        row.total_amount = 1500.0
+        row.transaction_count = 10
+        mock_repo = MagicMock()
+        mock_repo.get_category_monthly_summary = AsyncMock(return_value=[row])
+
+        with patch("app.routers.transactions.TransactionRepository", return_value=mock_repo):
+            response = client.post(
+                "/transactions/categories/monthly",
+                json={"transaction_type": "expense", "start_date": "2026-01-01T00:00:00"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {
+                "month": "2026-01-01T00:00:00",
+                "category_id": 1,
+                "category_name": "Продукты",
+                "total_amount": 1500.0,
+                "transaction_count": 10,
+            }
+        ]
+        mock_repo.get_category_monthly_summary.assert_called_once_with(
+            user_id=123,
+            transaction_type="expense",
+            start_date=datetime(2026, 1, 1),
+            end_date=None,
+        )
+
+    @pytest.mark.asyncio
+    async def test_monthly_invalid_type_returns_422(self, client):
+        response = client.post("/transactions/categories/monthly", json={"transaction_type": "other"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -1,12 +1,18 @@
+import asyncio
 import hashlib
 import hmac
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
+import jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from dotenv import load_dotenv
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from jwt import InvalidTokenError
 
 load_dotenv()
 
@@ -15,18 +21,56 @@ REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY")
 BANK_SECRET_KEY = os.getenv("BANK_SECRET_KEY")
 ALGORITHM = "HS256"
 
-# Хэширование паролей
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+def _key_bytes(key: str | None) -> bytes | None:
+    """Секрет в байтах; пустой или из одних пробелов — None."""
+    return key.encode("utf-8") if key and key.strip() else None
+
+
+# Ключи в байтах считаются один раз при импорте, а не на каждый encode/decode/HMAC
+_ACCESS_KEY = _key_bytes(ACCESS_SECRET_KEY)
+_REFRESH_KEY = _key_bytes(REFRESH_SECRET_KEY)
+_BANK_KEY = BANK_SECRET_KEY.encode("utf-8") if BANK_SECRET_KEY is not None else None
+
+# Хэширование паролей: argon2-cffi напрямую, без диспетчеризации схем passlib.
+# Значения по умолчанию (argon2id, m=65536 КиБ, t=3, p=4) совпадают с прежними хэшами passlib.
+# Параметры записываются в сам хэш, поэтому после их смены старые хэши по-прежнему проверяются
+password_hasher = PasswordHasher(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "3")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "4")),
+)
+
+# argon2 считается в отдельных потоках (C-код отпускает GIL), чтобы не блокировать event loop на десятки мс.
+# Пул ограничен числом ядер: больше одновременных хэшей не ускорят ответ, а память на каждый — memory_cost
+_argon2_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="argon2")
+
+
+def _verify_password_sync(plain_password, hashed_password):
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 # Проверка валидности пароля
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_argon2_executor, _verify_password_sync, plain_password, hashed_password)
+
+
+# Хэш посчитан с прежними параметрами argon2 и его стоит пересчитать
+def password_needs_rehash(hashed_password: str) -> bool:
+    try:
+        return password_hasher.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return False
 
 
 # Получение хэш пароля
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_argon2_executor, password_hasher.hash, password)
 
 
 # Создание access токена
@@ -37,7 +81,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None, refresh_jti
         raise ValueError("data must not be empty")
 
     try:
-        if not ACCESS_SECRET_KEY or not isinstance(ACCESS_SECRET_KEY, str) or not ACCESS_SECRET_KEY.strip():
+        if not _ACCESS_KEY:
             raise ValueError("ACCESS_SECRET_KEY must be a non-empty string")
 
         to_encode = data.copy()
@@ -55,7 +99,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None, refresh_jti
         if refresh_jti is not None:
             to_encode["refresh_jti"] = str(refresh_jti)
 
-        encoded_jwt = jwt.encode(to_encode, ACCESS_SECRET_KEY, algorithm=ALGORITHM)
+        encoded_jwt = jwt.encode(to_encode, _ACCESS_KEY, algorithm=ALGORITHM)
 
         if not isinstance(encoded_jwt, str):
             encoded_jwt = encoded_jwt.decode("utf-8")
@@ -64,19 +108,19 @@ def create_access_token(data: dict, expires_delta: timedelta = None, refresh_jti
 
     except (TypeError, ValueError) as ve:
         raise ValueError(f"Validation error in create_access_token: {ve}")
-    except (JWTError, Exception) as e:
+    except (InvalidTokenError, Exception) as e:
         raise RuntimeError(f"Failed to create access token: {e}")
 
 
 # Создание refresh токена
-def create_refresh_token(data: dict, expires_delta: timedelta):
+def create_refresh_token(data: dict, expires_delta: timedelta, jti: str | None = None):
     if not isinstance(data, dict):
         raise TypeError("data must be a dict")
     if not data:
         raise ValueError("data must not be empty")
 
     try:
-        if not REFRESH_SECRET_KEY or not isinstance(REFRESH_SECRET_KEY, str) or not REFRESH_SECRET_KEY.strip():
+        if not _REFRESH_KEY:
             raise ValueError("REFRESH_SECRET_KEY must be a non-empty string")
 
         to_encode = data.copy()
@@ -88,11 +132,11 @@ def create_refresh_token(data: dict, expires_delta: timedelta):
                 "exp": int(expire.timestamp()),
                 "iat": int(now.timestamp()),
                 "type": "refresh",
-                "jti": str(uuid.uuid4()),
+                "jti": jti or str(uuid.uuid4()),
             }
         )
 
-        encoded_jwt = jwt.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
+        encoded_jwt = jwt.encode(to_encode, _REFRESH_KEY, algorithm=ALGORITHM)
 
         if not isinstance(encoded_jwt, str):
             encoded_jwt = encoded_jwt.decode("utf-8")
@@ -101,38 +145,54 @@ def create_refresh_token(data: dict, expires_delta: timedelta):
 
     except (TypeError, ValueError) as ve:
         raise ValueError(f"Validation error in create_refresh_token: {ve}")
-    except (JWTError, Exception) as e:
+    except (InvalidTokenError, Exception) as e:
         raise RuntimeError(f"Failed to create refresh token: {e}")
 
 
+# Результаты декодирования токенов: повторные запросы с тем же токеном не пересчитывают HMAC и не разбирают JSON.
+# Кэшируется и отказ (битая подпись не станет валидной), а exp проверяется при каждом обращении
+@lru_cache(maxsize=4096)
+def _decode_cached(token: str, key: bytes, require_jti: bool) -> dict | None:
+    try:
+        options = {"require": ["jti"]} if require_jti else None
+        return jwt.decode(token, key, algorithms=[ALGORITHM], options=options)
+    except InvalidTokenError:
+        return None
+
+
+def _decode(token: str, key: bytes | None, require_jti: bool = False) -> dict | None:
+    if not key:
+        return None
+    payload = _decode_cached(token, key, require_jti)
+    if payload is None:
+        return None
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)) and exp <= time.time():
+        return None
+    # Копия, чтобы вызывающий код не мог испортить закэшированный payload
+    return dict(payload)
+
+
 # Проверка валидности токена
 def verify_token(token: str, refresh_token_from_cookie: str | None = None):
-    try:
-        if not ACCESS_SECRET_KEY:
-            return None
-        payload = jwt.decode(token, ACCESS_SECRET_KEY, algorithms=[ALGORITHM])
-        refresh_jti_in_access = str(payload.get("refresh_jti"))
-
-        if refresh_jti_in_access:
-            if not refresh_token_from_cookie:
-                return None
-            try:
-                refresh_payload = jwt.decode(
-                    refresh_token_from_cookie, REFRESH_SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["jti"]}
-                )
-                current_refresh_jti = str(refresh_payload.get("jti"))
-
-                if refresh_jti_in_access != current_refresh_jti:
-                    return None
-            except JWTError:
-                return None
-        return payload
-
-    except JWTError:
+    payload = _decode(token, _ACCESS_KEY)
+    if payload is None:
         return None
+    refresh_jti_in_access = str(payload.get("refresh_jti"))
+
+    if refresh_jti_in_access:
+        if not refresh_token_from_cookie:
+            return None
+        refresh_payload = _decode(refresh_token_from_cookie, _REFRESH_KEY, require_jti=True)
+        if refresh_payload is None:
+            return None
+        current_refresh_jti = str(refresh_payload.get("jti"))
+
+        if refresh_jti_in_access != current_refresh_jti:
+            return None
+    return payload
 
 
 # Шифрование номера банковского счета
 def get_bank_account_number_hash(bank_account_number: str):
-    secret_key = BANK_SECRET_KEY.encode("utf-8")
-    return hmac.new(secret_key, bank_account_number.encode("utf-8"), hashlib.sha256).hexdigest()
+    return hmac.new(_BANK_KEY, bank_account_number.encode("utf-8"), hashlib.sha256).hexdigest()
@@ -6,18 +6,76 @@ import os
 
 from shared.cache import CacheClient
 
+# Служебный элемент набора jti: набор не пустеет после отзыва последнего токена,
+# поэтому «ключа нет» однозначно значит «набор потерян или ещё не заведён», а не «всё отозвано»
+_REFRESH_JTIS_SENTINEL = "*"
+
+# Ротация refresh токена одним атомарным вызовом.
+# KEYS[1] — набор действующих jti, KEYS[2] — метка «old jti только что заменён»;
+# ARGV: old jti, new jti, TTL набора, окно повторного использования (сек).
+#  - набора нет (выдан до отслеживания, вытеснен, FLUSHDB, failover) — токен принимается, набор заводится заново;
+#  - old jti в наборе — заменяется на new, old на пару секунд помечается как только что заменённый;
+#  - old jti нет, но метка жива — параллельный refresh из другой вкладки, тоже принимается;
+#  - иначе токен уже использован или отозван — 0
+_ROTATE_REFRESH_JTI_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    if redis.call('SREM', KEYS[1], ARGV[1]) == 1 then
+        redis.call('SET', KEYS[2], '1', 'EX', ARGV[4])
+    elseif redis.call('EXISTS', KEYS[2]) == 0 then
+        return 0
+    end
+end
+redis.call('SADD', KEYS[1], ARGV[5], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class UsersCacheClient(CacheClient):
+    """Кэш users-service: кроме профилей хранит действующие jti refresh токенов"""
+
+    async def connect(self) -> None:
+        await super().connect()
+        # Скрипт вызывается через EVALSHA; если Redis его не знает (перезапуск), redis-py загрузит его сам
+        self._rotate_refresh_jti = self.redis.register_script(_ROTATE_REFRESH_JTI_SCRIPT)
+
+    async def add_refresh_jti(self, user_id: int, jti: str, ttl: int) -> None:
+        """Запомнить jti выданного refresh токена (SADD + EXPIRE за один запрос)"""
+        key = refresh_jtis_key(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(key, _REFRESH_JTIS_SENTINEL, jti)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def rotate_refresh_jti(self, user_id: int, old_jti: str, new_jti: str, ttl: int) -> bool:
+        """Заменить jti refresh токена на новый. False — старый токен уже использован или отозван"""
+        result = await self._rotate_refresh_jti(
+            keys=[refresh_jtis_key(user_id), refresh_rotated_key(user_id, old_jti)],
+            args=[old_jti, new_jti, ttl, REFRESH_ROTATION_GRACE, _REFRESH_JTIS_SENTINEL],
+        )
+        return result == 1
+
+    async def revoke_refresh_jti(self, user_id: int, jti: str) -> None:
+        """Отозвать refresh токен"""
+        await self.redis.srem(refresh_jtis_key(user_id), jti)
+
+
 # Инициализация клиента Redis
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
-cache_client = CacheClient(redis_url=REDIS_URL)
+cache_client = UsersCacheClient(redis_url=REDIS_URL)
 
 
 # TTL (в секундах)
 USER_PROFILE_TTL = 300  # 5 минут для профиля пользователя
 BANK_ACCOUNTS_TTL = 300  # 5 минут для списка банковских счетов
+# Сколько уже заменённый refresh токен ещё принимается: две вкладки обновляют токены одновременно
+REFRESH_ROTATION_GRACE = 10
 
 # Ключи кэша
 USER_PROFILE_PREFIX = "user:profile:"
 BANK_ACCOUNTS_PREFIX = "user:bank_accounts:"
+REFRESH_JTIS_PREFIX = "user:refresh_jtis:"
+REFRESH_ROTATED_PREFIX = "user:refresh_rotated:"
 
 
 def user_profile_key(user_id: int) -> str:
@@ -28,3 +86,13 @@ def user_profile_key(user_id: int) -> str:
 def bank_accounts_key(user_id: int) -> str:
     """Ключ для списка банковских счетов пользователя."""
     return f"{BANK_ACCOUNTS_PREFIX}{user_id}"
+
+
+def refresh_jtis_key(user_id: int) -> str:
+    """Ключ для набора действующих jti refresh токенов пользователя."""
+    return f"{REFRESH_JTIS_PREFIX}{user_id}"
+
+
+def refresh_rotated_key(user_id: int, jti: str) -> str:
+    """Ключ метки «refresh токен с этим jti только что заменён»."""
+    return f"{REFRESH_ROTATED_PREFIX}{user_id}:{jti}"
@@ -8,6 +8,8 @@ from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from shared.db_indexes import create_missing_indexes_concurrently
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,9 +19,25 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Размер пула на процесс (воркер uvicorn); итог по сервису — умножить на число воркеров
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 # Создание асинхронного соединения для БД
 # pool_size/max_overflow not supported by SQLite (used in tests)
-_pool_kwargs = {} if (DATABASE_URL or "").startswith("sqlite") else {"pool_size": 20, "max_overflow": 40, "pool_pre_ping": True}
+# pool_recycle — пересоздаём соединения раз в 30 минут, до того как их оборвёт Postgres или балансировщик
+_pool_kwargs = (
+    {}
+    if (DATABASE_URL or "").startswith("sqlite")
+    else {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+)
 engine = create_async_engine(DATABASE_URL, echo=False, future=True, **_pool_kwargs)
 
 # Создание асинхронных сессий для БД
@@ -68,6 +86,14 @@ async def create_tables():
     logger.info("✅ Таблицы созданы)")
 
 
+async def create_missing_indexes():
+    """
+    Досоздать индексы, добавленные в модели после создания таблиц (create_all их не трогает).
+    CREATE INDEX CONCURRENTLY — запись в users на время построения не блокируется.
+    """
+    await create_missing_indexes_concurrently(engine, User_Base.metadata, lock_name="users_service:indexes")
+
+
 # Асинхронное закрытие соединений при остановке
 async def shutdown():
     await engine.dispose()
\ No newline at end of file
@@ -1,18 +1,30 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 import uvicorn
 from app.cache import cache_client
-from app.database import create_tables, shutdown
+from app.database import create_missing_indexes, create_tables, shutdown
 from app.models import *  # noqa: F403
 from app.routers import bank_account, users
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from shared.event_publisher import EventPublisher
 from shared.logging import LoggingMiddleware, setup_logging
 
 setup_logging(service_name="users-service")
+logger = logging.getLogger(__name__)
+
+
+# Индексы на существующей таблице строятся в фоне (CONCURRENTLY): сервис принимает запросы, не дожидаясь их
+async def build_missing_indexes():
+    try:
+        await create_missing_indexes()
+    except Exception as e:
+        logger.error(f"Index build error: {e}", exc_info=True)
 
 
 @asynccontextmanager
@@ -20,13 +32,17 @@ async def life_span(app: FastAPI):
     await cache_client.connect()
     await EventPublisher.connect()
     await create_tables()
+    index_task = asyncio.create_task(build_missing_indexes())
     yield
+    if not index_task.done():
+        index_task.cancel()
     await cache_client.close()
     await EventPublisher.close()
     await shutdown()
 
 
-app = FastAPI(title="Users-service", lifespan=life_span)
+# Профиль и токены сериализуются orjson, а не stdlib json
+app = FastAPI(title="Users-service", lifespan=life_span, default_response_class=ORJSONResponse)
 
 app.add_middleware(LoggingMiddleware)
 
@@ -50,4 +66,4 @@ async def health():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    uvicorn.run(app, host="0.0.0.0", port=8001, loop="uvloop", http="httptools")
@@ -1,4 +1,4 @@
-from sqlalchemy import DECIMAL, Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import DECIMAL, Boolean, Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import DeclarativeBase, relationship
 from sqlalchemy.sql import func
 
@@ -22,6 +22,14 @@ class User(User_Base):
 
     bank_accounts = relationship("Bank_Accounts", back_populates="user")
 
+    # Серверные значения (created_at, updated_at) возвращаются через RETURNING того же INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Логин: WHERE email = ? читает только id, хэш и is_active — index-only scan без обращения к таблице
+        Index("ix_users_email_login", "email", postgresql_include=["id", "hashed_password", "is_active"]),
+    )
+
 
 class Bank(User_Base):
     __tablename__ = "banks"
@@ -4,7 +4,8 @@ from uuid import uuid4
 
 from app.models import User
 from app.schemas import UserCreate, UserUpdate
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared.event_publisher import EventPublisher
@@ -17,27 +18,42 @@ class UserRepository:
         self.event_publisher = event_publisher or EventPublisher()
 
     async def get_by_id(self, user_id: int):
-        """Получить пользователя по ID"""
-        result = await self.db.execute(select(User).where(User.id == user_id))
-        return result.scalar_one_or_none()
+        """Получить пользователя по ID (сначала identity map сессии, затем запрос по первичному ключу)"""
+        return await self.db.get(User, user_id)
 
     async def get_by_email(self, email: str):
         """Получить пользователя по email"""
         result = await self.db.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
 
+    async def get_login_credentials(self, email: str):
+        """Получить id, хэш пароля и is_active по email — только то, что нужно для логина"""
+        result = await self.db.execute(select(User.id, User.hashed_password, User.is_active).where(User.email == email))
+        return result.one_or_none()
+
     async def create(self, user_data: UserCreate, hashed_password: str):
-        """Создать нового пользователя"""
-        db_user = User(
-            email=user_data.email,
-            first_name=user_data.first_name,
-            last_name=user_data.last_name,
-            middle_name=user_data.middle_name,
-            hashed_password=hashed_password,
+        """
+        Создать нового пользователя. Возвращает None, если email уже занят.
+        Один INSERT ... ON CONFLICT DO NOTHING RETURNING вместо SELECT + INSERT + SELECT,
+        и без гонки между проверкой email и вставкой.
+        """
+        stmt = (
+            insert(User)
+            .values(
+                email=user_data.email,
+                first_name=user_data.first_name,
+                last_name=user_data.last_name,
+                middle_name=user_data.middle_name,
+                hashed_password=hashed_password,
+            )
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(User)
         )
-        self.db.add(db_user)
+        result = await self.db.execute(stmt)
+        db_user = result.scalar_one_or_none()
+        if db_user is None:
+            return None
         await self.db.commit()
-        await self.db.refresh(db_user)
 
         event_data = {
             "user_id": db_user.id,
@@ -59,38 +75,46 @@ class UserRepository:
         return db_user
 
     async def update(self, user_id: int, user_update: UserUpdate):
-        """Обновить данные пользователя"""
-        db_user = await self.get_by_id(user_id)
-
-        if db_user:
-            update_data = user_update.model_dump(exclude_unset=True)
-            for field, value in update_data.items():
-                # Пустая строка для middle_name означает удаление (NULL в БД)
-                if field == "middle_name" and value == "":
-                    value = None
-                setattr(db_user, field, value)
-            await self.db.commit()
-            await self.db.refresh(db_user)
-
-            # Публикуем событие об обновлении данных пользователя
-            event_data = {
-                "user_id": db_user.id,
-                "first_name": db_user.first_name,
-                "last_name": db_user.last_name,
-                "middle_name": db_user.middle_name,
-            }
-
-            event = DomainEvent(
-                event_id=str(uuid4()),
-                event_type="user.updated",
-                source="users-service",
-                timestamp=datetime.now(),
-                payload=event_data,
-            )
-            await self.event_publisher.publish(event)
+        """
+        Обновить данные пользователя. Возвращает None, если пользователь не найден.
+        Один UPDATE ... RETURNING вместо SELECT + UPDATE.
+        """
+        update_data = user_update.model_dump(exclude_unset=True)
+        # Пустая строка для middle_name означает удаление (NULL в БД)
+        if update_data.get("middle_name") == "":
+            update_data["middle_name"] = None
+
+        stmt = update(User).where(User.id == user_id).values(**update_data).returning(User)
+        result = await self.db.execute(stmt)
+        db_user = result.scalar_one_or_none()
+        if db_user is None:
+            return None
+        await self.db.commit()
+
+        # Публикуем событие об обновлении данных пользователя
+        event_data = {
+            "user_id": db_user.id,
+            "first_name": db_user.first_name,
+            "last_name": db_user.last_name,
+            "middle_name": db_user.middle_name,
+        }
+
+        event = DomainEvent(
+            event_id=str(uuid4()),
+            event_type="user.updated",
+            source="users-service",
+            timestamp=datetime.now(),
+            payload=event_data,
+        )
+        await self.event_publisher.publish(event)
 
         return db_user
 
+    async def set_password_hash(self, user_id: int, hashed_password: str):
+        """Заменить хэш пароля пользователя"""
+        await self.db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+        await self.db.commit()
+
     async def exists_with_email(self, email: str):
         """Проверить существование пользователя с email"""
         user = await self.get_by_email(email)
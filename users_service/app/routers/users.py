@@ -1,11 +1,15 @@
+import logging
+import uuid
 from datetime import timedelta
 
+import jwt
 from app.auth import (
     ALGORITHM,
     REFRESH_SECRET_KEY,
     create_access_token,
     create_refresh_token,
     get_password_hash,
+    password_needs_rehash,
     verify_password,
     verify_token,
 )
@@ -14,7 +18,7 @@ from app.cache import (
     cache_client,
     user_profile_key,
 )
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db
 from app.repository.bank_account_repository import Bank_AccountRepository
 from app.repository.user_repository import UserRepository
 from app.schemas import (
@@ -25,14 +29,16 @@ from app.schemas import (
     UserUpdate,
     oauth2_scheme,
 )
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
-from jose import jwt
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/users", tags=["users"])
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 20
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+REFRESH_TOKEN_TTL = REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600  # секунд
 
 
 # Получение пользовательского репозитория
@@ -50,37 +56,62 @@ async def get_bank_account_repository(db: AsyncSession = Depends(get_db)):
 # Регистрация пользователя
 @router.post("/register", response_model=UserResponse)
 async def register(user_data: UserCreate, user_repo: UserRepository = Depends(get_user_repository)):
-    if await user_repo.exists_with_email(user_data.email):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     db_user = await user_repo.create(user_data, hashed_password)
+    if db_user is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     return db_user
 
 
+# Перехэширование пароля после смены параметров argon2. Выполняется после ответа на логин,
+# в своей сессии: сессия запроса к этому моменту уже закрыта
+async def rehash_password_if_needed(user_id: int, password: str, hashed_password: str) -> None:
+    if not password_needs_rehash(hashed_password):
+        return
+    try:
+        new_hash = await get_password_hash(password)
+        async with AsyncSessionLocal() as session:
+            await UserRepository(session).set_password_hash(user_id, new_hash)
+    except Exception:
+        logger.exception("Failed to rehash password for user %s", user_id)
+
+
 # Авторизация пользователя
 @router.post("/login", response_model=Token)
-async def login(response: Response, user_data: UserLogin, user_repo: UserRepository = Depends(get_user_repository)):
+async def login(
+    response: Response,
+    user_data: UserLogin,
+    background_tasks: BackgroundTasks,
+    user_repo: UserRepository = Depends(get_user_repository),
+):
 
-    user = await user_repo.get_by_email(user_data.email)
+    user = await user_repo.get_login_credentials(user_data.email)
 
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not user or not await verify_password(user_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
-    refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    refresh_token = create_refresh_token(data={"sub": str(user.id)}, expires_delta=refresh_token_expires)
+    background_tasks.add_task(rehash_password_if_needed, user.id, user_data.password, user.hashed_password)
 
-    refresh_payload = jwt.decode(refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-    refresh_jti = refresh_payload.get("jti")
+    # jti задаём сами, чтобы не декодировать только что подписанный refresh токен ради него
+    refresh_jti = str(uuid.uuid4())
+    refresh_token_expires = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    refresh_token = create_refresh_token(
+        data={"sub": str(user.id)}, expires_delta=refresh_token_expires, jti=refresh_jti
+    )
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id)}, expires_delta=access_token_expires, refresh_jti=refresh_jti
     )
+    try:
+        await cache_client.add_refresh_jti(user.id, refresh_jti, ttl=REFRESH_TOKEN_TTL)
+    except Exception as e:
+        # Без записи jti вход не ломаем: токен из ненайденного набора принимается при обновлении
+        logger.warning(f"Не удалось запомнить refresh jti пользователя {user.id}: {e}")
 
     response.set_cookie(
         key="refresh_token",
@@ -121,13 +152,26 @@ async def refresh_token(response: Response, request: Request, user_repo: UserRep
         if not user or not user.is_active:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User inactive or not found")
 
+        # Старый refresh токен одноразовый: повторное предъявление после окна REFRESH_ROTATION_GRACE
+        # (или после logout) отклоняется. Если набора jti в Redis нет, токен принимается и набор заводится заново
+        new_refresh_jti = str(uuid.uuid4())
+        try:
+            rotated = await cache_client.rotate_refresh_jti(
+                int(user_id), current_refresh_jti, new_refresh_jti, ttl=REFRESH_TOKEN_TTL
+            )
+        except Exception as e:
+            # Без Redis отзыв не проверить — токен не обмениваем (fail-closed), клиент повторит позже
+            logger.warning(f"Не удалось проверить refresh jti пользователя {user_id}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Token service temporarily unavailable"
+            )
+        if not rotated:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked")
+
         new_refresh_token = create_refresh_token(
-            data={"sub": user_id}, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+            data={"sub": user_id}, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS), jti=new_refresh_jti
         )
 
-        new_refresh_payload = jwt.decode(new_refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        new_refresh_jti = new_refresh_payload.get("jti")
-
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         new_access_token = create_access_token(
             data={"sub": user_id}, expires_delta=access_token_expires, refresh_jti=new_refresh_jti
@@ -146,14 +190,28 @@ async def refresh_token(response: Response, request: Request, user_repo: UserRep
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
 
 # TODO: secure=False изменить на True в продакшене
 # Выход из системы
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token:
+        try:
+            payload = jwt.decode(
+                refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["sub", "jti"]}
+            )
+            await cache_client.revoke_refresh_jti(int(payload["sub"]), str(payload["jti"]))
+        except (jwt.InvalidTokenError, ValueError):
+            # Истёкший или поддельный токен отзывать не нужно — cookie всё равно удаляется
+            pass
+        except Exception as e:
+            # Недоступный Redis выход не ломает: cookie удаляется в любом случае
+            logger.warning(f"Не удалось отозвать refresh jti при выходе: {e}")
+
     response.delete_cookie(
         key="refresh_token",
         secure=False,  # True в продакшене
@@ -1,13 +1,20 @@
 import re
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Annotated, Optional
 
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from pydantic import BaseModel, EmailStr, Field, StringConstraints, field_validator, model_validator
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
+# Email при входе уже проверен при регистрации: достаточно дешёвой проверки формата регуляркой в pydantic-core,
+# полный разбор email-validator нужен только на регистрации
+LoginEmailStr = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, to_lower=True, max_length=320, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$"),
+]
+
 
 class PasswordMixin:
     @field_validator("password")
@@ -71,14 +78,9 @@ class UserBase(BaseModel):
 class UserLogin(BaseModel, PasswordMixin):
     """Схема запроса авторизации"""
 
-    email: EmailStr
+    email: LoginEmailStr
     password: str = Field(..., min_length=8, description="Пароль (минимум 8 символа)")
 
-    @field_validator("email")
-    @classmethod
-    def normalize_email(cls, v: str) -> str:
-        return v.lower()
-
 
 class UserCreate(UserBase, PasswordMixin):
     """Схема создания пользователя"""
@@ -12,14 +12,14 @@ os.environ["BANK_SECRET_KEY"] = "test_bank_secret_key_integ"
 os.environ["PSEUDO_BANK_SERVICE_URL"] = "http://fake-bank-service"
 os.environ["REDIS_URL"] = "redis://localhost:6379"
 
+import jwt  # noqa: E402
 import pytest  # noqa: E402
 import pytest_asyncio  # noqa: E402
-from app.auth import ALGORITHM  # noqa: E402
+from app.auth import ALGORITHM, get_password_hash  # noqa: E402
 from app.database import User_Base, get_db  # noqa: E402
 from app.models import User  # noqa: E402
 from fastapi import Depends, FastAPI, Header, HTTPException  # noqa: E402
 from httpx import ASGITransport, AsyncClient  # noqa: E402
-from jose import jwt  # noqa: E402
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
 from sqlalchemy.pool import StaticPool  # noqa: E402
 
@@ -34,11 +34,13 @@ engine = create_async_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+# Как AsyncSessionLocal в app.database: объекты остаются загруженными после commit
 TestingSessionLocal = async_sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
     class_=AsyncSession,
+    expire_on_commit=False,
 )
 
 
@@ -59,12 +61,9 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
 
 @pytest_asyncio.fixture(scope="function")
 async def test_user(db_session: AsyncSession) -> User:
-    from passlib.context import CryptContext
-
-    pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
     user = User(
         email="integration@test.com",
-        hashed_password=pwd_context.hash("password123"),
+        hashed_password=await get_password_hash("password123"),
         first_name="Integration",
         last_name="Test",
         is_active=True,
@@ -125,6 +124,9 @@ def mock_users_cache_client():
         mock_cache.set = AsyncMock()
         mock_cache.delete = AsyncMock()
         mock_cache.delete_pattern = AsyncMock(return_value=0)
+        mock_cache.add_refresh_jti = AsyncMock()
+        mock_cache.rotate_refresh_jti = AsyncMock(return_value=True)
+        mock_cache.revoke_refresh_jti = AsyncMock()
         yield mock_cache
 
 
@@ -1,7 +1,7 @@
 import pytest
+from app.auth import get_password_hash
 from app.models import Bank, Bank_Accounts, User
 from httpx import AsyncClient
-from passlib.context import CryptContext
 
 pytestmark = pytest.mark.asyncio
 
@@ -127,12 +127,10 @@ async def test_rename_not_my_account(
 ):
     """❌ Попытка переименовать чужой счёт"""
     from app.models import Bank, Bank_Accounts, User
-    from passlib.context import CryptContext
 
-    pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
     other_user = User(
         email="rename_other@test.com",
-        hashed_password=pwd_context.hash("pass"),
+        hashed_password=await get_password_hash("pass"),
         first_name="Other",
         last_name="User",
         is_active=True,
@@ -172,11 +170,9 @@ async def test_delete_not_my_account(
 ):
     """❌ Попытка удалить чужой счет"""
 
-    pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
     other_user = User(
         email="other_user_integ@test.com",
-        hashed_password=pwd_context.hash("pass"),
+        hashed_password=await get_password_hash("pass"),
         first_name="Other",
         last_name="User",
         is_active=True,
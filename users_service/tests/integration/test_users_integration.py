@@ -1,9 +1,15 @@
 import pytest
+from app.models import User
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared.event_publisher import EventPublisher
 
+# passlib CryptContext(schemes=["argon2"]).hash("StrongPass123!")
+LEGACY_PASSLIB_HASH = (
+    "$argon2id$v=19$m=65536,t=3,p=4$i1FKyVlLyblXKuWcM2aMUQ$7eVVEPgO4vF+KGSALazo+PLbzSdJw1eMGVI+pNBKJu4"
+)
+
 
 # Тест регистрации
 @pytest.mark.asyncio
@@ -137,3 +143,24 @@ async def test_login_wrong_password(client: AsyncClient):
 
     assert response.status_code == 401
     assert response.json()["detail"] == "Incorrect email or password"
+
+
+# Тест входа с хэшем, созданным ещё через passlib: формат PHC тот же, пароли пользователей не сбрасываются
+@pytest.mark.asyncio
+async def test_login_with_legacy_passlib_hash(client: AsyncClient, db_session: AsyncSession):
+    db_session.add(
+        User(
+            email="legacy@example.com",
+            hashed_password=LEGACY_PASSLIB_HASH,
+            first_name="Legacy",
+            last_name="Test",
+            is_active=True,
+        )
+    )
+    await db_session.commit()
+
+    response = await client.post("/users/login", json={"email": "legacy@example.com", "password": "StrongPass123!"})
+    assert response.status_code == 200
+
+    response = await client.post("/users/login", json={"email": "legacy@example.com", "password": "StrongPass124!"})
+    assert response.status_code == 401
@@ -47,6 +47,9 @@ def mock_users_cache_client():
         mock_cache.set = AsyncMock()
         mock_cache.delete = AsyncMock()
         mock_cache.delete_pattern = AsyncMock(return_value=0)
+        mock_cache.add_refresh_jti = AsyncMock()
+        mock_cache.rotate_refresh_jti = AsyncMock(return_value=True)
+        mock_cache.revoke_refresh_jti = AsyncMock()
         yield mock_cache
 
 
@@ -62,6 +65,7 @@ def mock_user_repo():
     repo = MagicMock(spec=UserRepository)
     repo.get_by_id = AsyncMock(return_value=None)
     repo.get_by_email = AsyncMock(return_value=None)
+    repo.get_login_credentials = AsyncMock(return_value=None)
     repo.create = AsyncMock(return_value=MagicMock(id=1, email="test@example.com"))
     repo.update = AsyncMock(return_value=None)
     repo.exists_with_email = AsyncMock(return_value=False)
@@ -100,6 +104,7 @@ def mock_db_session():
     """Мок сессии БД для unit-тестов репозитория"""
     session = MagicMock()
     session.execute = AsyncMock()
+    session.get = AsyncMock()
     session.commit = AsyncMock()
     session.refresh = AsyncMock()
     session.add = MagicMock()
@@ -185,19 +190,6 @@ async def client(app, mock_user_repo, mock_bank_account_cache_client, mock_users
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def mock_get_current_user(app):
-    """Фикстура для подмены зависимости аутентификации"""
-    from app.dependencies import get_current_user
-
-    async def _mock_get_current_user():
-        return MagicMock(id=1, email="test@example.com", first_name="Ivan", last_name="Ivanov", is_active=True)
-
-    app.dependency_overrides[get_current_user] = _mock_get_current_user
-    yield
-    app.dependency_overrides.pop(get_current_user, None)
-
-
 @pytest.fixture
 def bank_account_repo(mock_db_session, mock_event_publisher):
     """Экземпляр Bank_AccountRepository с мокнутыми зависимостями"""
@@ -1,6 +1,7 @@
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from app.models import User
 
 from shared.event_schema import DomainEvent
 from users_service.app.repository.user_repository import UserRepository
@@ -28,12 +29,9 @@ async def test_create_user_success(
     fake_saved_user.email = user_data.email
     fake_saved_user.first_name = user_data.first_name
 
-    def side_effect_refresh(obj):
-        obj.id = 1
-
-    mock_db_session.add = MagicMock()
-    mock_db_session.commit = AsyncMock()
-    mock_db_session.refresh = AsyncMock(side_effect=side_effect_refresh)
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = fake_saved_user
+    mock_db_session.execute.return_value = mock_result
 
     # Act
     result = await user_repo.create(user_data, "hashed_pwd_123")
@@ -42,13 +40,13 @@ async def test_create_user_success(
     assert result.id == 1
     assert result.email == "test@test.com"
 
-    # Проверка вызовов БД
-    mock_db_session.add.assert_called_once()
-    added_obj = mock_db_session.add.call_args[0][0]
-    assert added_obj.email == "test@test.com"
-
+    # Один INSERT ... ON CONFLICT DO NOTHING RETURNING вместо проверки email и отдельной вставки
+    mock_db_session.execute.assert_awaited_once()
+    statement = str(mock_db_session.execute.call_args[0][0])
+    assert "ON CONFLICT (email) DO NOTHING" in statement
+    assert "RETURNING" in statement
     mock_db_session.commit.assert_called_once()
-    mock_db_session.refresh.assert_called_once()
+    mock_db_session.refresh.assert_not_called()
 
     # Проверка события
     mock_event_publisher.publish.assert_called_once()
@@ -60,15 +58,32 @@ async def test_create_user_success(
     assert event_call_args.payload["user_id"] == 1
 
 
+@pytest.mark.asyncio
+async def test_create_user_duplicate_email(user_repo: UserRepository, mock_db_session, mock_event_publisher):
+    """Тест: email уже занят — INSERT ничего не вставил, возвращается None, событие не публикуется"""
+    user_data = UserCreate(
+        email="dup@test.com",
+        first_name="Ivan",
+        last_name="Ivanov",
+        password="SecurePassword123!",
+    )
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = None
+    mock_db_session.execute.return_value = mock_result
+
+    result = await user_repo.create(user_data, "hashed_pwd_123")
+
+    assert result is None
+    mock_db_session.commit.assert_not_called()
+    mock_event_publisher.publish.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_get_by_id_success(user_repo: UserRepository, mock_db_session):
     """Тест получения пользователя по ID"""
     # Arrange
     mock_user = MagicMock()
-    # Эмулируем цепочку: execute -> scalar_one_or_none
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = mock_user
-    mock_db_session.execute.return_value = mock_result
+    mock_db_session.get.return_value = mock_user
 
     # Act
     result = await user_repo.get_by_id(1)
@@ -76,16 +91,16 @@ async def test_get_by_id_success(user_repo: UserRepository, mock_db_session):
     # Assert
     assert result == mock_user
 
-    mock_db_session.execute.assert_called_once()
+    # Поиск по первичному ключу через session.get — без построения select
+    mock_db_session.get.assert_awaited_once_with(User, 1)
+    mock_db_session.execute.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_get_by_id_not_found(user_repo: UserRepository, mock_db_session):
     """Тест: пользователь не найден по ID"""
     # Arrange
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = None
-    mock_db_session.execute.return_value = mock_result
+    mock_db_session.get.return_value = None
 
     # Act
     result = await user_repo.get_by_id(999)
@@ -110,14 +125,32 @@ async def test_get_by_email_success(user_repo: UserRepository, mock_db_session):
     assert result == mock_user
 
 
+@pytest.mark.asyncio
+async def test_get_login_credentials_selects_only_auth_columns(user_repo: UserRepository, mock_db_session):
+    """Тест: для логина читаются только id, хэш пароля и is_active"""
+    # Arrange
+    mock_row = MagicMock(id=1, hashed_password="hash", is_active=True)
+    mock_result = MagicMock()
+    mock_result.one_or_none.return_value = mock_row
+    mock_db_session.execute.return_value = mock_result
+
+    # Act
+    result = await user_repo.get_login_credentials("test@test.com")
+
+    # Assert
+    assert result == mock_row
+    statement = mock_db_session.execute.call_args[0][0]
+    assert [column.name for column in statement.selected_columns] == ["id", "hashed_password", "is_active"]
+
+
 @pytest.mark.asyncio
 async def test_update_user_success(user_repo: UserRepository, mock_db_session, mock_event_publisher):
     """Тест успешного обновления пользователя"""
     # Arrange
-    mock_existing_user = MagicMock(id=1, first_name="Old", last_name="Old", middle_name="Old", email="old@test.com")
+    mock_updated_user = MagicMock(id=1, first_name="New", last_name="Old", middle_name="Old", email="old@test.com")
 
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = mock_existing_user
+    mock_result.scalar_one_or_none.return_value = mock_updated_user
     mock_db_session.execute.return_value = mock_result
 
     mock_db_session.commit = AsyncMock()
@@ -132,8 +165,14 @@ async def test_update_user_success(user_repo: UserRepository, mock_db_session, m
     assert result is not None
     assert result.first_name == "New"
 
+    # Один UPDATE ... RETURNING, без предварительного SELECT и refresh
+    mock_db_session.get.assert_not_called()
+    mock_db_session.execute.assert_awaited_once()
+    statement = mock_db_session.execute.call_args[0][0]
+    assert "RETURNING" in str(statement)
+    assert statement.compile().params["first_name"] == "New"
     mock_db_session.commit.assert_called_once()
-    mock_db_session.refresh.assert_called_once()
+    mock_db_session.refresh.assert_not_called()
 
     # Проверяем событие
     mock_event_publisher.publish.assert_called_once()
@@ -146,7 +185,7 @@ async def test_update_user_success(user_repo: UserRepository, mock_db_session, m
 async def test_update_user_not_found(user_repo: UserRepository, mock_db_session, mock_event_publisher):
     """Тест: обновление несуществующего пользователя"""
     # Arrange
-    # Возвращаем None при попытке найти пользователя
+    # UPDATE не затронул ни одной строки
     mock_result = MagicMock()
     mock_result.scalar_one_or_none.return_value = None
     mock_db_session.execute.return_value = mock_result
@@ -167,10 +206,10 @@ async def test_update_user_not_found(user_repo: UserRepository, mock_db_session,
 async def test_update_middle_name_empty_to_null(user_repo: UserRepository, mock_db_session):
     """Тест: middle_name="" преобразуется в None"""
     # Arrange
-    mock_existing_user = MagicMock(middle_name="Old", id=1, first_name="Test", last_name="Test", email="t@t.com")
+    mock_updated_user = MagicMock(middle_name=None, id=1, first_name="Test", last_name="Test", email="t@t.com")
 
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = mock_existing_user
+    mock_result.scalar_one_or_none.return_value = mock_updated_user
     mock_db_session.execute.return_value = mock_result
 
     mock_db_session.commit = AsyncMock()
@@ -182,6 +221,10 @@ async def test_update_middle_name_empty_to_null(user_repo: UserRepository, mock_
     result = await user_repo.update(1, update_data)
 
     # Assert
+    statement = mock_db_session.execute.call_args[0][0]
+    params = statement.compile().params
+    assert "middle_name" in params
+    assert params["middle_name"] is None
     assert result.middle_name is None
     assert mock_db_session.commit.called
 
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import status
@@ -7,7 +7,7 @@ patch_get_hash = patch("app.routers.users.get_password_hash", return_value="hash
 patch_verify_password = patch("app.routers.users.verify_password", return_value=True)
 patch_create_access = patch("app.routers.users.create_access_token", return_value="access_token")
 patch_create_refresh = patch("app.routers.users.create_refresh_token", return_value="refresh_token")
-patch_jwt_decode = patch("jose.jwt.decode", return_value={"jti": "jti_123"})
+patch_jwt_decode = patch("jwt.decode", return_value={"jti": "jti_123"})
 
 
 class TestRegister:
@@ -16,7 +16,6 @@ class TestRegister:
     @pytest.mark.asyncio
     async def test_register_success(self, client, mock_user_repo):
         """Тест: успешная регистрация"""
-        mock_user_repo.exists_with_email.return_value = False
         mock_user_repo.create.return_value = MagicMock(
             id=1,
             email="test@example.com",
@@ -43,13 +42,13 @@ class TestRegister:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["email"] == "test@example.com"
-        mock_user_repo.exists_with_email.assert_called_once_with("test@example.com")
+        mock_user_repo.exists_with_email.assert_not_called()
         mock_user_repo.create.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_register_email_already_exists(self, client, mock_user_repo):
-        """Тест: email уже зарегистрирован"""
-        mock_user_repo.exists_with_email.return_value = True
+        """Тест: email уже зарегистрирован — create ничего не вставил"""
+        mock_user_repo.create.return_value = None
 
         with patch_get_hash:
             response = await client.post(
@@ -91,7 +90,7 @@ class TestLogin:
     async def test_login_success(self, client, mock_user_repo):
         """Тест: успешный вход"""
         mock_user = MagicMock(id=1, email="test@example.com", hashed_password="$2b$12$hashed", is_active=True)
-        mock_user_repo.get_by_email.return_value = mock_user
+        mock_user_repo.get_login_credentials.return_value = mock_user
 
         with patch_verify_password, patch_create_access, patch_create_refresh, patch_jwt_decode:
             response = await client.post(
@@ -103,11 +102,31 @@ class TestLogin:
         assert "access_token" in data
         assert response.cookies.get("refresh_token") is not None
 
+    @pytest.mark.asyncio
+    async def test_login_links_tokens_without_decoding(self, client, mock_user_repo):
+        """Тест: jti refresh токена попадает в access токен без повторного декодирования refresh токена"""
+        mock_user_repo.get_login_credentials.return_value = MagicMock(id=1, hashed_password="hashed", is_active=True)
+
+        with (
+            patch_verify_password,
+            patch_create_access as mock_create_access,
+            patch_create_refresh as mock_create_refresh,
+            patch("jwt.decode") as mock_decode,
+        ):
+            response = await client.post(
+                "/users/login", json={"email": "test@example.com", "password": "SecurePass123!"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        refresh_jti = mock_create_refresh.call_args.kwargs["jti"]
+        assert mock_create_access.call_args.kwargs["refresh_jti"] == refresh_jti
+        mock_decode.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_login_wrong_password(self, client, mock_user_repo):
         """Тест: неверный пароль"""
         mock_user = MagicMock(id=1, email="test@example.com", hashed_password="$2b$12$hashed", is_active=True)
-        mock_user_repo.get_by_email.return_value = mock_user
+        mock_user_repo.get_login_credentials.return_value = mock_user
 
         # Патчим проверку пароля, чтобы вернуть False
         with patch("app.routers.users.verify_password", return_value=False):
@@ -120,7 +139,7 @@ class TestLogin:
     @pytest.mark.asyncio
     async def test_login_user_not_found(self, client, mock_user_repo):
         """Тест: пользователь не найден"""
-        mock_user_repo.get_by_email.return_value = None
+        mock_user_repo.get_login_credentials.return_value = None
         response = await client.post(
             "/users/login", json={"email": "notfound@example.com", "password": "SecurePass123!"}
         )
@@ -130,7 +149,7 @@ class TestLogin:
     async def test_login_inactive_user(self, client, mock_user_repo):
         """Тест: неактивный пользователь"""
         mock_user = MagicMock(id=1, email="test@example.com", hashed_password="$2b$12$hashed", is_active=False)
-        mock_user_repo.get_by_email.return_value = mock_user
+        mock_user_repo.get_login_credentials.return_value = mock_user
 
         with patch_verify_password:
             response = await client.post(
@@ -139,6 +158,85 @@ class TestLogin:
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+    @pytest.mark.asyncio
+    async def test_login_schedules_rehash_after_response(self, client, mock_user_repo):
+        """Тест: проверка параметров хэша уходит в фоновую задачу после ответа"""
+        mock_user_repo.get_login_credentials.return_value = MagicMock(id=7, hashed_password="old_hash", is_active=True)
+
+        with (
+            patch_verify_password,
+            patch_create_access,
+            patch_create_refresh,
+            patch("app.routers.users.rehash_password_if_needed", new_callable=AsyncMock) as mock_rehash,
+        ):
+            response = await client.post(
+                "/users/login", json={"email": "test@example.com", "password": "SecurePass123!"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_rehash.assert_awaited_once_with(7, "SecurePass123!", "old_hash")
+
+    @pytest.mark.asyncio
+    async def test_login_registers_refresh_jti(self, client, mock_user_repo, mock_users_cache_client):
+        """Тест: jti выданного refresh токена запоминается в Redis"""
+        mock_user_repo.get_login_credentials.return_value = MagicMock(id=1, hashed_password="hashed", is_active=True)
+
+        with patch_verify_password, patch_create_access, patch_create_refresh as mock_create_refresh:
+            response = await client.post(
+                "/users/login", json={"email": "test@example.com", "password": "SecurePass123!"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        refresh_jti = mock_create_refresh.call_args.kwargs["jti"]
+        mock_users_cache_client.add_refresh_jti.assert_awaited_once_with(1, refresh_jti, ttl=7 * 24 * 3600)
+
+    @pytest.mark.asyncio
+    async def test_login_survives_cache_outage(self, client, mock_user_repo, mock_users_cache_client):
+        """Тест: недоступный Redis не ломает вход"""
+        mock_user_repo.get_login_credentials.return_value = MagicMock(id=1, hashed_password="hashed", is_active=True)
+        mock_users_cache_client.add_refresh_jti.side_effect = ConnectionError("redis down")
+
+        with patch_verify_password, patch_create_access, patch_create_refresh:
+            response = await client.post(
+                "/users/login", json={"email": "test@example.com", "password": "SecurePass123!"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "refresh_token" in response.cookies
+
+
+class TestRehashPassword:
+    """Тесты фонового перехэширования пароля"""
+
+    @pytest.mark.asyncio
+    async def test_outdated_hash_replaced(self):
+        """Тест: хэш со старыми параметрами пересчитывается и сохраняется"""
+        from app.routers.users import rehash_password_if_needed
+
+        repo = MagicMock(set_password_hash=AsyncMock())
+        with (
+            patch("app.routers.users.password_needs_rehash", return_value=True),
+            patch("app.routers.users.get_password_hash", return_value="new_hash"),
+            patch("app.routers.users.AsyncSessionLocal", MagicMock()),
+            patch("app.routers.users.UserRepository", return_value=repo),
+        ):
+            await rehash_password_if_needed(7, "SecurePass123!", "old_hash")
+
+        repo.set_password_hash.assert_awaited_once_with(7, "new_hash")
+
+    @pytest.mark.asyncio
+    async def test_current_hash_left_as_is(self):
+        """Тест: актуальный хэш не пересчитывается"""
+        from app.routers.users import rehash_password_if_needed
+
+        with (
+            patch("app.routers.users.password_needs_rehash", return_value=False),
+            patch("app.routers.users.get_password_hash") as mock_hash,
+        ):
+            await rehash_password_if_needed(7, "SecurePass123!", "current_hash")
+
+        mock_hash.assert_not_called()
+
 
 class TestRefreshToken:
     """Тесты обновления refresh токена"""
@@ -151,7 +249,7 @@ class TestRefreshToken:
         mock_user_repo.get_by_id.return_value = mock_user
 
         with (
-            patch("jose.jwt.decode", return_value={"sub": "1", "type": "refresh", "jti": "jti_123"}),
+            patch("jwt.decode", return_value={"sub": "1", "type": "refresh", "jti": "jti_123"}),
             patch("app.routers.users.create_refresh_token", return_value="new_refresh_token"),
             patch("app.routers.users.create_access_token", return_value="new_access_token"),
         ):
@@ -164,6 +262,56 @@ class TestRefreshToken:
             assert "refresh_token" in response.cookies
             assert response.cookies["refresh_token"] == "new_refresh_token"
 
+    @pytest.mark.asyncio
+    async def test_refresh_token_rotates_jti(self, client, mock_user_repo, mock_users_cache_client):
+        """Тест: старый jti заменяется новым, тем же, что записан в новый refresh токен"""
+        client.cookies.set("refresh_token", "valid_refresh_token")
+        mock_user_repo.get_by_id.return_value = MagicMock(id=1, is_active=True)
+
+        with (
+            patch("jwt.decode", return_value={"sub": "1", "type": "refresh", "jti": "jti_123"}),
+            patch("app.routers.users.create_refresh_token", return_value="new_refresh_token") as mock_create_refresh,
+            patch("app.routers.users.create_access_token", return_value="new_access_token"),
+        ):
+            response = await client.post("/users/refresh")
+
+        assert response.status_code == status.HTTP_200_OK
+        new_jti = mock_create_refresh.call_args.kwargs["jti"]
+        mock_users_cache_client.rotate_refresh_jti.assert_awaited_once_with(1, "jti_123", new_jti, ttl=7 * 24 * 3600)
+
+    @pytest.mark.asyncio
+    async def test_refresh_token_reuse_rejected(self, client, mock_user_repo, mock_users_cache_client):
+        """Тест: уже использованный (или отозванный) refresh токен не обменивается повторно"""
+        client.cookies.set("refresh_token", "used_refresh_token")
+        mock_user_repo.get_by_id.return_value = MagicMock(id=1, is_active=True)
+        mock_users_cache_client.rotate_refresh_jti.return_value = False
+
+        with (
+            patch("jwt.decode", return_value={"sub": "1", "type": "refresh", "jti": "jti_123"}),
+            patch("app.routers.users.create_refresh_token") as mock_create_refresh,
+        ):
+            response = await client.post("/users/refresh")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Refresh token revoked"
+        mock_create_refresh.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_refresh_token_cache_outage(self, client, mock_user_repo, mock_users_cache_client):
+        """Тест: без Redis refresh токен не обменивается — 503, а не 500"""
+        client.cookies.set("refresh_token", "valid_refresh_token")
+        mock_user_repo.get_by_id.return_value = MagicMock(id=1, is_active=True)
+        mock_users_cache_client.rotate_refresh_jti.side_effect = ConnectionError("redis down")
+
+        with (
+            patch("jwt.decode", return_value={"sub": "1", "type": "refresh", "jti": "jti_123"}),
+            patch("app.routers.users.create_refresh_token") as mock_create_refresh,
+        ):
+            response = await client.post("/users/refresh")
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        mock_create_refresh.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_refresh_token_missing(self, client):
         """Тест: отсутствует refresh токен"""
@@ -176,7 +324,7 @@ class TestRefreshToken:
         """Тест: неверный тип токена"""
         client.cookies.set("refresh_token", "wrong_type_token")
 
-        with patch("jose.jwt.decode", return_value={"type": "access", "sub": "1", "jti": "jti"}):
+        with patch("jwt.decode", return_value={"type": "access", "sub": "1", "jti": "jti"}):
             response = await client.post("/users/refresh")
 
             assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -185,11 +333,11 @@ class TestRefreshToken:
     @pytest.mark.asyncio
     async def test_refresh_token_expired(self, client):
         """Тест: истёкший refresh токен"""
-        from jose import jwt
+        import jwt
 
         client.cookies.set("refresh_token", "expired_token")
 
-        with patch("jose.jwt.decode", side_effect=jwt.ExpiredSignatureError()):
+        with patch("jwt.decode", side_effect=jwt.ExpiredSignatureError()):
             response = await client.post("/users/refresh")
 
             assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -201,7 +349,7 @@ class TestRefreshToken:
         client.cookies.set("refresh_token", "valid_token")
         mock_user_repo.get_by_id.return_value = None
 
-        with patch("jose.jwt.decode", return_value={"sub": "999", "type": "refresh", "jti": "jti"}):
+        with patch("jwt.decode", return_value={"sub": "999", "type": "refresh", "jti": "jti"}):
             response = await client.post("/users/refresh")
 
             assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -217,6 +365,39 @@ class TestLogout:
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["msg"] == "Logged out"
 
+    @pytest.mark.asyncio
+    async def test_logout_revokes_refresh_token(self, client, mock_users_cache_client):
+        """Тест: при выходе jti refresh токена из cookie отзывается"""
+        client.cookies.set("refresh_token", "valid_refresh_token")
+
+        with patch("jwt.decode", return_value={"sub": "1", "type": "refresh", "jti": "jti_123"}):
+            response = await client.post("/users/logout")
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_users_cache_client.revoke_refresh_jti.assert_awaited_once_with(1, "jti_123")
+
+    @pytest.mark.asyncio
+    async def test_logout_survives_cache_outage(self, client, mock_users_cache_client):
+        """Тест: недоступный Redis не ломает выход, cookie удаляется"""
+        client.cookies.set("refresh_token", "valid_refresh_token")
+        mock_users_cache_client.revoke_refresh_jti.side_effect = ConnectionError("redis down")
+
+        with patch("jwt.decode", return_value={"sub": "1", "type": "refresh", "jti": "jti_123"}):
+            response = await client.post("/users/logout")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["msg"] == "Logged out"
+
+    @pytest.mark.asyncio
+    async def test_logout_with_invalid_cookie(self, client, mock_users_cache_client):
+        """Тест: битый refresh токен не мешает выходу"""
+        client.cookies.set("refresh_token", "garbage")
+
+        response = await client.post("/users/logout")
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_users_cache_client.revoke_refresh_jti.assert_not_called()
+
 
 class TestGetCurrentUser:
     """Тесты получения текущего пользователя"""
@@ -243,22 +424,14 @@ class TestGetCurrentUser:
         assert response.json()["email"] == "test@example.com"
 
     @pytest.mark.asyncio
-    async def test_get_current_user_not_found(self, client, mock_user_repo, app):
+    async def test_get_current_user_not_found(self, client, mock_user_repo):
         """Тест: пользователь не найден"""
-        from app.dependencies import get_current_user
-
-        async def mock_get_current_user_not_found():
-            return MagicMock(id=999, email="notfound@example.com")
-
-        # Используем app из фикстуры
-        app.dependency_overrides[get_current_user] = mock_get_current_user_not_found
         mock_user_repo.get_by_id.return_value = None
 
         with patch("app.routers.users.verify_token", return_value={"sub": "999"}):
             response = await client.get("/users/me", headers={"Authorization": "Bearer valid_token"})
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
-        app.dependency_overrides.pop(get_current_user, None)
 
 
 class TestUpdateCurrentUser:
@@ -286,14 +459,8 @@ class TestUpdateCurrentUser:
         assert response.json()["first_name"] == "NewName"
 
     @pytest.mark.asyncio
-    async def test_update_profile_not_found(self, client, mock_user_repo, app):
+    async def test_update_profile_not_found(self, client, mock_user_repo):
         """Тест: пользователь не найден при обновлении"""
-        from app.dependencies import get_current_user
-
-        async def mock_get_current_user_not_found():
-            return MagicMock(id=999, email="notfound@example.com")
-
-        app.dependency_overrides[get_current_user] = mock_get_current_user_not_found
         mock_user_repo.update.return_value = None
 
         with patch("app.routers.users.verify_token", return_value={"sub": "999"}):
@@ -302,7 +469,6 @@ class TestUpdateCurrentUser:
             )
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
-        app.dependency_overrides.pop(get_current_user, None)
 
     @pytest.mark.asyncio
     async def test_update_profile_empty_body(self, client):
@@ -343,7 +509,7 @@ class TestUserFlow:
         assert reg_response.status_code == status.HTTP_200_OK
 
         # 2. Логин
-        mock_user_repo.get_by_email.return_value = MagicMock(
+        mock_user_repo.get_login_credentials.return_value = MagicMock(
             id=1, email="test@example.com", hashed_password="$2b$12$hashed", is_active=True
         )
         with patch_verify_password, patch_create_access, patch_create_refresh, patch_jwt_decode:
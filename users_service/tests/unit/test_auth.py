@@ -0,0 +1,96 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import jwt
+import pytest
+from app.auth import get_password_hash, password_needs_rehash, verify_password, verify_token
+from argon2 import PasswordHasher
+
+
+class TestPasswordHashing:
+    """Тесты хэширования паролей"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self):
+        """Тест: хэш проверяется верным паролем и не проверяется неверным"""
+        hashed = await get_password_hash("StrongPass123!")
+
+        assert hashed.startswith("$argon2id$")
+        assert await verify_password("StrongPass123!", hashed) is True
+        assert await verify_password("WrongPass123!", hashed) is False
+
+    @pytest.mark.asyncio
+    async def test_invalid_hash_returns_false(self):
+        """Тест: битый хэш в БД — просто неверный пароль, а не 500"""
+        assert await verify_password("StrongPass123!", "not-a-hash") is False
+
+    @pytest.mark.asyncio
+    async def test_hashing_runs_off_event_loop_thread(self):
+        """Тест: argon2 считается в отдельном пуле потоков, event loop не блокируется"""
+        threads = []
+
+        def fake_hash(password):
+            threads.append(threading.current_thread())
+            return "hashed"
+
+        with patch("app.auth.password_hasher", MagicMock(hash=fake_hash)):
+            assert await get_password_hash("StrongPass123!") == "hashed"
+
+        assert threads[0] is not threading.current_thread()
+        assert threads[0].name.startswith("argon2")
+
+    def test_needs_rehash_for_outdated_parameters(self):
+        """Тест: хэш с другими параметрами argon2 помечается к пересчёту, битый — нет"""
+        outdated = PasswordHasher(time_cost=1, memory_cost=1024, parallelism=1).hash("StrongPass123!")
+
+        assert password_needs_rehash(outdated) is True
+        assert password_needs_rehash("not-a-hash") is False
+
+
+class TestVerifyToken:
+    """Тесты проверки access-токена"""
+
+    KEY = b"test-access-key"
+    REFRESH_KEY = b"test-refresh-key"
+
+    def _tokens(self, sub: str, exp: int):
+        refresh = jwt.encode({"sub": sub, "jti": f"jti-{sub}", "exp": exp}, self.REFRESH_KEY, algorithm="HS256")
+        access = jwt.encode({"sub": sub, "refresh_jti": f"jti-{sub}", "exp": exp}, self.KEY, algorithm="HS256")
+        return access, refresh
+
+    def test_repeated_token_decoded_once(self):
+        """Тест: повторная проверка того же токена берётся из кэша, без повторного jwt.decode"""
+        access, refresh = self._tokens("cache-1", int(time.time()) + 600)
+
+        with (
+            patch("app.auth._ACCESS_KEY", self.KEY),
+            patch("app.auth._REFRESH_KEY", self.REFRESH_KEY),
+            patch("app.auth.jwt.decode", wraps=jwt.decode) as mock_decode,
+        ):
+            first = verify_token(access, refresh_token_from_cookie=refresh)
+            second = verify_token(access, refresh_token_from_cookie=refresh)
+
+        assert first == second
+        assert first["sub"] == "cache-1"
+        # По одному разу на access и refresh токен
+        assert mock_decode.call_count == 2
+
+    def test_cached_token_rejected_after_expiry(self):
+        """Тест: закэшированный токен перестаёт проходить проверку после exp"""
+        exp = int(time.time()) + 600
+        access, refresh = self._tokens("cache-2", exp)
+
+        with patch("app.auth._ACCESS_KEY", self.KEY), patch("app.auth._REFRESH_KEY", self.REFRESH_KEY):
+            assert verify_token(access, refresh_token_from_cookie=refresh) is not None
+            with patch("app.auth.time.time", return_value=exp + 1):
+                assert verify_token(access, refresh_token_from_cookie=refresh) is None
+
+    def test_refresh_jti_mismatch_rejected(self):
+        """Тест: access-токен не проходит проверку с чужим refresh-токеном"""
+        exp = int(time.time()) + 600
+        access, _ = self._tokens("cache-3", exp)
+        _, other_refresh = self._tokens("cache-4", exp)
+
+        with patch("app.auth._ACCESS_KEY", self.KEY), patch("app.auth._REFRESH_KEY", self.REFRESH_KEY):
+            assert verify_token(access, refresh_token_from_cookie=other_refresh) is None